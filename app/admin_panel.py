@@ -0,0 +1,47 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import streamlit as st
+from utils.agents.tracing import summarize_spans
+from utils.openai_scheduler import get_openai_scheduler
+from utils.supabase_data_utils import get_user_data_cache
+
+
+def is_admin(user):
+    """Admins are listed by email in the comma-separated ADMIN_EMAILS environment variable."""
+    admin_emails = {e.strip().lower() for e in os.environ.get("ADMIN_EMAILS", "").split(",") if e.strip()}
+    return bool(user.email) and user.email.lower() in admin_emails
+
+
+def render_admin_metrics():
+    """
+    Render p50/p95 latency, token usage and cost per agent, handoff, tool,
+    model and Supabase query from the span log.
+    """
+    with st.expander("Agent Performance (admin)", expanded=False):
+        window = st.selectbox("Time window", ["Last hour", "Last 24 hours", "Last 7 days", "All"], index=1)
+        since = {
+            "Last hour": timedelta(hours=1),
+            "Last 24 hours": timedelta(days=1),
+            "Last 7 days": timedelta(days=7),
+        }.get(window)
+
+        scheduler_metrics = get_openai_scheduler().metrics()
+        st.markdown("**OpenAI scheduler (this worker)**")
+        depth = scheduler_metrics.pop("queue_depth")
+        st.write(f"Queued now: {depth['interactive']} interactive, {depth['background']} background")
+        st.json(scheduler_metrics)
+
+        st.markdown("**Skills/competencies cache (this worker)**")
+        st.json(get_user_data_cache().stats())
+
+        summary = summarize_spans(since=datetime.now(timezone.utc) - since if since else None)
+        if not summary:
+            st.info("No spans recorded yet.")
+            return
+
+        for kind in ["trace", "agent", "handoff", "tool", "model", "supabase", "custom"]:
+            rows = [row for row in summary if row["kind"] == kind]
+            if rows:
+                st.markdown(f"**{kind.capitalize()}**")
+                st.dataframe([{k: v for k, v in row.items() if k != "kind"} for row in rows], use_container_width=True)
@@ -1,5 +1,5 @@
 import streamlit as st
-from utils.llm_service import generate_response
+from utils.llm_service import generate_response_stream
 
 
 def render_chat_interface(supabase, user):
@@ -38,15 +38,25 @@ def process_user_input(supabase, user, user_input):
     with st.chat_message("user"):
         st.markdown(user_input)
 
-    with st.spinner(".."):
-
-        response = generate_response(supabase, user, user_input)
-
-        st.session_state.messages.append({"role": "assistant", "content": response})
-
-        with st.chat_message("assistant"):
-            st.markdown(response)
-
-
-
-
+    with st.chat_message("assistant"):
+        status_placeholder = st.empty()
+        response_placeholder = st.empty()
+        status_placeholder.caption("Thinking...")
+
+        response = ""
+        for event in generate_response_stream(supabase, user, user_input):
+            if event["type"] == "text":
+                response += event["delta"]
+                status_placeholder.empty()
+                response_placeholder.markdown(response + "▌")
+            elif event["type"] == "handoff":
+                status_placeholder.caption(f"Consulting {event['agent']}...")
+            elif event["type"] == "tool_call":
+                status_placeholder.caption(f"{event['agent']} is using {event['tool']}...")
+            elif event["type"] == "error":
+                response = f"{response}\n\n{event['content']}" if response else event["content"]
+
+        status_placeholder.empty()
+        response_placeholder.markdown(response)
+
+    st.session_state.messages.append({"role": "assistant", "content": response})
@@ -42,6 +42,7 @@ def render_competencies_assessment(st, supabase, user):
             status, count = save_user_competencies(supabase, user, st.session_state.core_competencies_ratings)
 
             if status == "updated":
+                st.session_state.career_matches_stale = True
                 st.success(f"✅ {count} competencies updated.")
             elif status == "already_exists":
                 st.info("ℹ️ All competencies already exist with the same ratings.")
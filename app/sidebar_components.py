@@ -1,8 +1,11 @@
 
 import streamlit as st
 from utils.resume_parser import parse_resume
+from utils.resume_cache import file_digest
 from utils.visualizer import create_svg_skills_visualization, categorize_skills
 from utils.supabase_data_utils import fetch_saved_competencies
+from utils.career_matcher import compute_career_matches
+from utils.agents.response_cache import SUGGESTED_PROMPTS
 
 
 def render_sidebar(supabase, user):
@@ -21,6 +24,9 @@ def render_sidebar(supabase, user):
         render_skills_display(supabase, user_id)
         render_user_competencies(supabase, user_id)
 
+        if st.session_state.get("career_matches_stale", True):
+            refresh_career_matches(supabase, user_id)
+
         if st.session_state.get("career_matches"):
             render_career_matches()
 
@@ -54,7 +60,7 @@ def render_api_key_input():
 def render_resume_upload(supabase, user):
     uploaded_file = st.file_uploader("Upload your resume", type=["pdf", "docx"])
     if uploaded_file:
-        file_hash = hash(uploaded_file.getvalue())
+        file_hash = file_digest(uploaded_file.getvalue())
         if file_hash != st.session_state.get("uploaded_resume_hash"):
             with st.spinner("Analyzing resume..."):
                 api_key = st.session_state.get("openai_api_key", "")
@@ -62,6 +68,7 @@ def render_resume_upload(supabase, user):
                 st.session_state.uploaded_resume_hash = file_hash
                 st.session_state.resume_text = parsed.get("text", "")
                 st.session_state.skills = parsed.get("skills", [])
+                st.session_state.career_matches_stale = True
 
                 if st.session_state.skills:
                     st.success(f"Found {len(st.session_state.skills)} skills!")
@@ -111,6 +118,12 @@ def render_skills_display(supabase, user_id):
 
 
 
+def refresh_career_matches(supabase, user_id):
+    competencies = fetch_saved_competencies(supabase, user_id)
+    st.session_state.career_matches = compute_career_matches(st.session_state.get("skills", []), competencies)
+    st.session_state.career_matches_stale = False
+
+
 def render_career_matches():
     st.subheader("Career Matches")
     for match in st.session_state.career_matches[:3]:
@@ -119,11 +132,7 @@ def render_career_matches():
 
 def render_prompt_suggestions(agent_manager):
     st.subheader("Try asking:")
-    for prompt in [
-        "What careers match my skills?",
-        "What skills should I develop?",
-        "What are the top tech careers?"
-    ]:
+    for prompt in SUGGESTED_PROMPTS:
         if st.button(prompt):
             st.session_state.messages.append({"role": "user", "content": prompt})
 
@@ -0,0 +1,399 @@
+# benchmarks/fake_openai_server.py
+"""
+Local stand-in for the parts of the OpenAI API this app uses.
+
+Serves chat completions, the Responses API (blocking and streamed, including
+function calls, handoffs and hosted file/web search calls), files and vector
+stores, with configurable latency distributions and scripted answers.
+
+    python -m benchmarks.fake_openai_server --port 8765 --latency responses=lognormal:800:0.4
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 streamlit run main.py
+"""
+import argparse
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_LATENCY = {
+    "chat": "lognormal:600:0.4",
+    "responses": "lognormal:700:0.4",
+    "ttft": "lognormal:400:0.3",
+    "token": "fixed:15",
+    "files": "fixed:50",
+    "vector_stores": "fixed:80",
+}
+
+DEFAULT_SCRIPT = {
+    "answer": (
+        "According to the ASC knowledge base, Software Engineer (ANZSCO: 261313) matches your skills in "
+        "python and sql. Data Analyst (ANZSCO: 224114) is also a strong match for your numeracy rating."
+    ),
+    "skills": "['python', 'sql', 'aws', 'docker', 'git']",
+    "summary": "The user has python and sql skills and is exploring software and data careers in Australia.",
+}
+
+_ids = itertools.count(1)
+
+
+def _new_id(prefix):
+    return f"{prefix}_{next(_ids):08d}"
+
+
+def parse_latency(spec):
+    """
+    Parse a latency spec into a sampler returning seconds.
+
+    Specs (milliseconds): "fixed:MS", "uniform:LO:HI", "lognormal:MEDIAN:SIGMA".
+    """
+    kind, *params = spec.split(":")
+    values = [float(p) for p in params]
+    if kind == "fixed":
+        return lambda: values[0] / 1000
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1]) / 1000
+    if kind == "lognormal":
+        return lambda: random.lognormvariate(0, values[1]) * values[0] / 1000
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def _usage(input_text, output_text):
+    input_tokens = len(input_text) // 4 + 1
+    output_tokens = len(output_text) // 4 + 1
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens,
+        "input_tokens_details": {"cached_tokens": 0},
+        "output_tokens_details": {"reasoning_tokens": 0},
+    }
+
+
+class FakeOpenAIState:
+    def __init__(self, latency=None, script=None):
+        specs = dict(DEFAULT_LATENCY, **(latency or {}))
+        self.latency = {name: parse_latency(spec) for name, spec in specs.items()}
+        self.script = dict(DEFAULT_SCRIPT, **(script or {}))
+        self.files = {}
+        self.vector_stores = {}
+        self.lock = threading.Lock()
+        self.request_counts = {}
+
+    def sleep(self, name):
+        time.sleep(self.latency[name]())
+
+    def count(self, name):
+        with self.lock:
+            self.request_counts[name] = self.request_counts.get(name, 0) + 1
+
+    def plan_response_output(self, body):
+        """Decide what the model "does" for a Responses API request."""
+        items = body.get("input")
+        items = [{"role": "user", "content": items}] if isinstance(items, str) else items or []
+        tools = body.get("tools") or []
+        function_names = [t.get("name") for t in tools if t.get("type") == "function"]
+        hosted = {t.get("type") for t in tools if t.get("type") != "function"}
+        called = {item.get("name") for item in items if item.get("type") == "function_call"}
+        user_texts = [item.get("content") for item in items if item.get("role") == "user"]
+        query = user_texts[-1] if user_texts and isinstance(user_texts[-1], str) else ""
+
+        def function_call(name, arguments):
+            return [{
+                "type": "function_call", "id": _new_id("fc"), "call_id": _new_id("call"),
+                "name": name, "arguments": json.dumps(arguments), "status": "completed",
+            }]
+
+        if "get_user_profile" in function_names and "get_user_profile" not in called:
+            return function_call("get_user_profile", {})
+
+        transfers = [name for name in function_names if name.startswith("transfer_to_")]
+        if transfers and not any(name.startswith("transfer_to_") for name in called):
+            wants_jobs = re.search(r"\b(jobs?|hiring|vacanc|openings?)\b", query, re.IGNORECASE)
+            job_transfers = [name for name in transfers if "job" in name]
+            other_transfers = [name for name in transfers if "job" not in name]
+            target = (job_transfers if wants_jobs and job_transfers else other_transfers or transfers)[0]
+            return function_call(target, {})
+
+        if "lookup_cached_jobs" in function_names and "lookup_cached_jobs" not in called:
+            return function_call("lookup_cached_jobs", {"location": "Australia", "role": ""})
+
+        output = []
+        if "file_search" in hosted:
+            output.append({
+                "type": "file_search_call", "id": _new_id("fs"), "queries": [query], "status": "completed",
+                "results": None,
+            })
+        if "web_search_preview" in hosted:
+            output.append({"type": "web_search_call", "id": _new_id("ws"), "status": "completed"})
+        output.append({
+            "type": "message", "id": _new_id("msg"), "role": "assistant", "status": "completed",
+            "content": [{"type": "output_text", "text": self.script["answer"], "annotations": []}],
+        })
+        return output
+
+    def response_object(self, body, output):
+        output_text = " ".join(
+            part["text"] for item in output if item["type"] == "message" for part in item["content"]
+        )
+        return {
+            "id": _new_id("resp"), "object": "response", "created_at": time.time(),
+            "model": body.get("model", "gpt-4o"), "status": "completed", "output": output,
+            "parallel_tool_calls": True, "tool_choice": "auto", "tools": body.get("tools") or [],
+            "temperature": 1.0, "top_p": 1.0, "metadata": {}, "error": None, "incomplete_details": None,
+            "instructions": body.get("instructions"),
+            "usage": _usage(json.dumps(body.get("input")) + (body.get("instructions") or ""), output_text),
+        }
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        content_type = self.headers.get("Content-Type", "")
+        if raw and content_type.startswith("application/json"):
+            return json.loads(raw)
+        return {"_raw": raw, "_content_type": content_type}
+
+    def _send_json(self, payload, status=200):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _start_sse(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+    def _send_event(self, payload):
+        self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode())
+        self.wfile.flush()
+
+    def do_GET(self):
+        self._route("GET", {})
+
+    def do_POST(self):
+        self._route("POST", self._read_body())
+
+    def do_DELETE(self):
+        self._route("DELETE", {})
+
+    def _route(self, method, body):
+        path = self.path.split("?")[0].rstrip("/")
+        path = path[len("/v1"):] if path.startswith("/v1") else path
+        state = self.state
+
+        if method == "POST" and path == "/chat/completions":
+            return self._chat_completions(body)
+        if method == "POST" and path == "/responses":
+            return self._responses(body)
+
+        if path.startswith("/files"):
+            state.count("files")
+            state.sleep("files")
+            return self._files(method, path, body)
+        if path.startswith("/vector_stores"):
+            state.count("vector_stores")
+            state.sleep("vector_stores")
+            return self._vector_stores(method, path, body)
+
+        self._send_json({"error": {"message": f"Unsupported endpoint {method} {path}"}}, status=404)
+
+    def _chat_completions(self, body):
+        state = self.state
+        state.count("chat")
+        prompt = json.dumps(body.get("messages", []))
+        text = state.script["skills"] if "resume parser" in prompt.lower() else state.script["summary"]
+        if body.get("response_format", {}).get("type") == "json_schema":
+            skills = re.findall(r"'(.*?)'", state.script["skills"])
+            text = json.dumps({"skills": skills})
+        state.sleep("chat")
+        self._send_json({
+            "id": _new_id("chatcmpl"), "object": "chat.completion", "created": int(time.time()),
+            "model": body.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": len(prompt) // 4 + 1,
+                "completion_tokens": len(text) // 4 + 1,
+                "total_tokens": (len(prompt) + len(text)) // 4 + 2,
+            },
+        })
+
+    def _responses(self, body):
+        state = self.state
+        state.count("responses")
+        output = state.plan_response_output(body)
+        response = state.response_object(body, output)
+
+        if not body.get("stream"):
+            state.sleep("responses")
+            return self._send_json(response)
+
+        self._start_sse()
+        in_progress = dict(response, status="in_progress", output=[])
+        self._send_event({"type": "response.created", "response": in_progress})
+        state.sleep("ttft")
+        for index, item in enumerate(output):
+            if item["type"] != "message":
+                self._send_event({"type": "response.output_item.added", "output_index": index, "item": item})
+                self._send_event({"type": "response.output_item.done", "output_index": index, "item": item})
+                continue
+            text = item["content"][0]["text"]
+            started = dict(item, status="in_progress", content=[])
+            self._send_event({"type": "response.output_item.added", "output_index": index, "item": started})
+            for chunk in re.findall(r"\S+\s*", text):
+                self._send_event({
+                    "type": "response.output_text.delta", "item_id": item["id"], "output_index": index,
+                    "content_index": 0, "delta": chunk,
+                })
+                state.sleep("token")
+            self._send_event({
+                "type": "response.output_text.done", "item_id": item["id"], "output_index": index,
+                "content_index": 0, "text": text,
+            })
+            self._send_event({"type": "response.output_item.done", "output_index": index, "item": item})
+        self._send_event({"type": "response.completed", "response": response})
+
+    def _files(self, method, path, body):
+        state = self.state
+        parts = path.split("/")[2:]
+        if method == "POST" and not parts:
+            match = re.search(rb'filename="([^"]+)"', body.get("_raw", b""))
+            file_id = _new_id("file")
+            file_object = {
+                "id": file_id, "object": "file", "bytes": len(body.get("_raw", b"")), "created_at": int(time.time()),
+                "filename": match.group(1).decode() if match else "upload.txt", "purpose": "assistants",
+                "status": "processed",
+            }
+            with state.lock:
+                state.files[file_id] = file_object
+            return self._send_json(file_object)
+        if method == "GET" and not parts:
+            return self._send_json({"object": "list", "data": list(state.files.values()), "has_more": False})
+        if method == "DELETE" and parts:
+            with state.lock:
+                state.files.pop(parts[0], None)
+            return self._send_json({"id": parts[0], "object": "file", "deleted": True})
+        self._send_json({"error": {"message": f"Unsupported files call {method} {path}"}}, status=404)
+
+    def _vector_stores(self, method, path, body):
+        state = self.state
+        parts = path.split("/")[2:]
+
+        def store_object(store):
+            return {
+                "id": store["id"], "object": "vector_store", "name": store["name"], "created_at": store["created_at"],
+                "status": "completed", "usage_bytes": 0, "last_active_at": store["created_at"], "metadata": {},
+                "file_counts": {
+                    "in_progress": 0, "completed": len(store["files"]), "failed": 0, "cancelled": 0,
+                    "total": len(store["files"]),
+                },
+            }
+
+        def file_object(store_id, file_id):
+            return {
+                "id": file_id, "object": "vector_store.file", "vector_store_id": store_id, "status": "completed",
+                "created_at": int(time.time()), "usage_bytes": 0, "last_error": None,
+            }
+
+        if not parts:
+            if method == "POST":
+                store = {"id": _new_id("vs"), "name": body.get("name"), "created_at": int(time.time()), "files": []}
+                with state.lock:
+                    state.vector_stores[store["id"]] = store
+                return self._send_json(store_object(store))
+            return self._send_json({
+                "object": "list", "data": [store_object(s) for s in state.vector_stores.values()], "has_more": False,
+            })
+
+        store = state.vector_stores.get(parts[0])
+        if store is None:
+            return self._send_json({"error": {"message": "No such vector store"}}, status=404)
+
+        if parts[1:2] == ["files"]:
+            if method == "GET":
+                return self._send_json({
+                    "object": "list", "data": [file_object(store["id"], f) for f in store["files"]], "has_more": False,
+                })
+            if method == "DELETE" and len(parts) > 2:
+                with state.lock:
+                    if parts[2] in store["files"]:
+                        store["files"].remove(parts[2])
+                return self._send_json({"id": parts[2], "object": "vector_store.file.deleted", "deleted": True})
+            if method == "POST":
+                with state.lock:
+                    store["files"].append(body["file_id"])
+                return self._send_json(file_object(store["id"], body["file_id"]))
+
+        if parts[1:2] == ["file_batches"]:
+            if method == "POST" and len(parts) == 2:
+                with state.lock:
+                    store["files"].extend(body.get("file_ids", []))
+                count = len(body.get("file_ids", []))
+            else:
+                count = 0
+            return self._send_json({
+                "id": parts[2] if len(parts) > 2 else _new_id("vsfb"), "object": "vector_store.file_batch",
+                "vector_store_id": store["id"], "status": "completed", "created_at": int(time.time()),
+                "file_counts": {"in_progress": 0, "completed": count, "failed": 0, "cancelled": 0, "total": count},
+            })
+
+        if method == "GET":
+            return self._send_json(store_object(store))
+        self._send_json({"error": {"message": f"Unsupported vector store call {method} {path}"}}, status=404)
+
+
+def start_server(host="127.0.0.1", port=0, latency=None, script=None):
+    """
+    Start the fake server on a background thread.
+
+    Returns:
+        tuple: (server, state, base_url)
+    """
+    state = FakeOpenAIState(latency=latency, script=script)
+    handler = type("BoundFakeOpenAIHandler", (FakeOpenAIHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-openai", daemon=True).start()
+    return server, state, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def parse_latency_args(values):
+    latency = {}
+    for value in values or []:
+        name, spec = value.split("=", 1)
+        parse_latency(spec)
+        latency[name] = spec
+    return latency
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", action="append", metavar="NAME=SPEC",
+                        help=f"Override a latency distribution. Names: {', '.join(DEFAULT_LATENCY)}")
+    parser.add_argument("--script", help="JSON file overriding the scripted 'answer', 'skills' and 'summary'")
+    args = parser.parse_args()
+
+    script = json.load(open(args.script)) if args.script else None
+    server, _, base_url = start_server(args.host, args.port, parse_latency_args(args.latency), script)
+    print(f"Fake OpenAI API listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,404 @@
+# benchmarks/run_benchmark.py
+"""
+Offline latency benchmark for the chat and resume paths.
+
+Starts the fake OpenAI server (or uses --base-url), points the app at it with
+throwaway cache and span-log paths, and drives concurrent sessions through
+AgentManager and the resume pipeline with an in-memory Supabase stand-in.
+Reports p50/p95 per stage, throughput and the span-log summary.
+
+    python -m benchmarks.run_benchmark --sessions 8 --concurrency 4
+    python -m benchmarks.run_benchmark --latency responses=fixed:200 --resume my_resume.pdf
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_openai_server import DEFAULT_LATENCY, parse_latency_args, start_server
+
+QUERIES = [
+    "What careers match my skills?",
+    "Which occupations suit someone with python and sql?",
+    "Find me data analyst jobs in Melbourne",
+    "What skills should I develop to become a data engineer?",
+]
+FOLLOW_UP = "Can you tell me more about the first one?"
+SAMPLE_RESUME_LINES = [
+    "Jane Citizen",
+    "jane.citizen@example.com | 0412 345 678 | 12 Example Street, Carlton, VIC 3053",
+    "Technologies",
+    "Proficient: Python, SQL, Pandas, Docker, Git",
+    "Familiar: AWS, Terraform, React",
+    "Experience",
+    "Data Analyst, Example Pty Ltd, Melbourne - built reporting pipelines in Python and SQL.",
+]
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+        self.error = None
+
+
+class FakeQuery:
+    """Just enough of the supabase-py query builder for the app's data helpers."""
+
+    def __init__(self, store, table):
+        self.store = store
+        self.table = table
+        self.filters = []
+        self.action = "select"
+        self.payload = None
+        self.single = False
+        self.conflict_columns = []
+        self.ignore_duplicates = False
+
+    def select(self, *columns):
+        self.action = "select"
+        return self
+
+    def insert(self, payload, upsert=False):
+        self.action, self.payload = "insert", payload
+        return self
+
+    def upsert(self, payload, on_conflict="", ignore_duplicates=False, **kwargs):
+        self.action, self.payload = "upsert", payload
+        self.conflict_columns = [column for column in on_conflict.split(",") if column]
+        self.ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, payload):
+        self.action, self.payload = "update", payload
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def maybe_single(self):
+        self.single = True
+        return self
+
+    def execute(self):
+        time.sleep(self.store.latency)
+        with self.store.lock:
+            rows = self.store.tables.setdefault(self.table, [])
+            matched = [row for row in rows if all(f(row) for f in self.filters)]
+            if self.action == "select":
+                data = [dict(row) for row in matched]
+                return FakeResponse((data[0] if data else None) if self.single else data)
+            if self.action == "update":
+                for row in matched:
+                    row.update(self.payload)
+                return FakeResponse([dict(row) for row in matched])
+            payload = self.payload if isinstance(self.payload, list) else [self.payload]
+            for new_row in payload:
+                existing = next(
+                    (
+                        row for row in rows
+                        if self.conflict_columns and all(row.get(c) == new_row.get(c) for c in self.conflict_columns)
+                    ),
+                    None,
+                )
+                if existing is None:
+                    rows.append(dict(new_row))
+                elif not self.ignore_duplicates:
+                    existing.update(new_row)
+            return FakeResponse([dict(row) for row in payload])
+
+
+class FakeProfileRpc:
+    """The get_user_profile_data function from sql/get_user_profile_data.sql, over the fake tables."""
+
+    def __init__(self, store, params):
+        self.store = store
+        self.params = params
+
+    def execute(self):
+        time.sleep(self.store.latency)
+        user_id = self.params["p_user_id"]
+        with self.store.lock:
+            skills = sorted(
+                ({"skill": row["skill"]} for row in self.store.tables.get("user_skills", []) if row["user_id"] == user_id),
+                key=lambda row: row["skill"],
+            )
+            competencies = sorted(
+                (dict(row) for row in self.store.tables.get("user_competencies", []) if row["user_id"] == user_id),
+                key=lambda row: row["competency_name"],
+            )
+        version = hashlib.md5(json.dumps([skills, competencies], sort_keys=True).encode()).hexdigest()
+        if version == self.params.get("p_known_version"):
+            return FakeResponse({"version": version, "unchanged": True})
+        return FakeResponse(
+            {"version": version, "unchanged": False, "user_skills": skills, "user_competencies": competencies}
+        )
+
+
+class FakeSupabase:
+    def __init__(self, latency_seconds=0.02):
+        self.latency = latency_seconds
+        self.tables = {}
+        self.lock = threading.Lock()
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, fn, params=None):
+        if fn != "get_user_profile_data":
+            raise ValueError(f"Unknown function {fn}")
+        return FakeProfileRpc(self, params or {})
+
+    def seed_user(self, user_id, skills, competencies):
+        with self.lock:
+            self.tables.setdefault("user_skills", []).extend({"user_id": user_id, "skill": s} for s in skills)
+            self.tables.setdefault("user_competencies", []).extend(
+                {"user_id": user_id, "competency_name": name, "rating": rating} for name, rating in competencies.items()
+            )
+
+
+class UploadedFile(io.BytesIO):
+    """Stand-in for Streamlit's UploadedFile."""
+
+    def __init__(self, data, name, mime_type):
+        super().__init__(data)
+        self.name = name
+        self.type = mime_type
+
+
+def make_sample_pdf(lines):
+    """Build a minimal single-page PDF with one line of text per entry."""
+    escaped = [line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in lines]
+    stream = "BT /F1 11 Tf 50 780 Td 14 TL " + " ".join(f"({line}) Tj T*" for line in escaped) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 4 0 R "
+        "/Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+class StageTimings:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.lock = threading.Lock()
+
+    def record(self, stage, seconds, error=None):
+        with self.lock:
+            self.samples.setdefault(stage, []).append(seconds * 1000)
+            if error:
+                self.errors[stage] = self.errors.get(stage, 0) + 1
+
+    def timed(self, stage, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record(stage, time.perf_counter() - start, error=e)
+            print(f"{stage} failed: {e}")
+            return None
+        self.record(stage, time.perf_counter() - start)
+        return result
+
+    def summary(self):
+        rows = []
+        for stage, values in self.samples.items():
+            values = sorted(values)
+            rows.append({
+                "stage": stage,
+                "count": len(values),
+                "errors": self.errors.get(stage, 0),
+                "p50_ms": round(values[int(round(0.50 * (len(values) - 1)))], 1),
+                "p95_ms": round(values[int(round(0.95 * (len(values) - 1)))], 1),
+                "max_ms": round(values[-1], 1),
+            })
+        return rows
+
+
+def run_chat_session(index, api_key, supabase, timings):
+    from utils.agents.agent_manager import AgentManager
+
+    user = SimpleNamespace(id=f"bench-user-{index}-{uuid.uuid4().hex[:8]}")
+    # Distinct profiles per session so the response cache only hits on genuine repeats.
+    supabase.seed_user(user.id, ["python", "sql", f"skill-{index}"], {"Numeracy": 7, "Teamwork": 5 + index % 5})
+
+    manager = AgentManager(api_key=api_key, supabase=supabase, user=user)
+    timings.timed("initialize_agents", manager.initialize_agents)
+
+    query = QUERIES[index % len(QUERIES)]
+    messages = [{"role": "user", "content": query}]
+
+    start = time.perf_counter()
+    first_token = None
+    answer = []
+    errored = False
+    for event in manager.stream_user_query(query, messages=messages):
+        if event["type"] == "text":
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            answer.append(event["delta"])
+        elif event["type"] == "error":
+            errored = True
+            print(f"Session {index} stream error: {event['content']}")
+    timings.record("stream_total", time.perf_counter() - start, error=errored or None)
+    if first_token is not None:
+        timings.record("stream_first_token", first_token)
+
+    messages += [{"role": "assistant", "content": "".join(answer)}, {"role": "user", "content": FOLLOW_UP}]
+    timings.timed("follow_up", manager.process_user_query, FOLLOW_UP, messages=messages)
+    timings.timed("cached_repeat", manager.process_user_query, query, messages=[{"role": "user", "content": query}])
+
+
+def run_resume_session(index, api_key, supabase, resume_bytes, resume_name, resume_type, timings):
+    from utils import resume_parser
+    from utils.resume_cache import extractor_version, get_resume_cache, resume_cache_key
+    from utils.supabase_data_utils import save_user_skills_to_supabase
+
+    user = SimpleNamespace(id=f"bench-resume-{index}-{uuid.uuid4().hex[:8]}")
+    start = time.perf_counter()
+    text = timings.timed("resume_extract_text", resume_parser.extract_text_from_resume,
+                         UploadedFile(resume_bytes, resume_name, resume_type))
+    masked = timings.timed("resume_mask_pii", resume_parser.mask_pii_spacy_au, text or "")
+    skills = timings.timed("resume_extract_skills", resume_parser.extract_skills_from_resume, masked or "", api_key)
+    timings.timed("resume_save_skills", save_user_skills_to_supabase, supabase, user, skills or [])
+    timings.record("resume_total", time.perf_counter() - start)
+
+    # What a repeat upload of the same file costs: a hash and a cache lookup.
+    key = resume_cache_key(resume_bytes, extractor_version(api_key))
+    get_resume_cache().put(key, text or "", masked or "", skills or [])
+    timings.timed("resume_repeat_upload", lambda: get_resume_cache().get(
+        resume_cache_key(resume_bytes, extractor_version(api_key))
+    ))
+
+
+def print_table(rows, columns):
+    widths = {c: max(len(c), *(len(str(row.get(c))) for row in rows)) for c in columns} if rows else {}
+    print("  ".join(c.ljust(widths.get(c, len(c))) for c in columns))
+    for row in rows:
+        print("  ".join(str(row.get(c)).ljust(widths[c]) for c in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=8, help="Chat sessions to run")
+    parser.add_argument("--resumes", type=int, default=4, help="Resumes to push through the parser")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--base-url", help="Use an already running OpenAI-compatible server")
+    parser.add_argument("--latency", action="append", metavar="NAME=SPEC",
+                        help=f"Fake server latency override. Names: {', '.join(DEFAULT_LATENCY)}")
+    parser.add_argument("--script", help="JSON file overriding the fake server's scripted answers")
+    parser.add_argument("--supabase-latency-ms", type=float, default=20.0)
+    parser.add_argument("--resume", help="PDF or DOCX resume to use instead of the generated sample")
+    parser.add_argument("--backend", default="file_search", choices=["file_search", "local"],
+                        help="ASC retrieval backend (ASC_RETRIEVAL_BACKEND)")
+    parser.add_argument("--json", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    if args.base_url:
+        base_url = args.base_url
+    else:
+        script = json.load(open(args.script)) if args.script else None
+        _, _, base_url = start_server(latency=parse_latency_args(args.latency), script=script)
+
+    workdir = tempfile.mkdtemp(prefix="chataussiegpt-bench-")
+    api_key = "sk-benchmark"
+    os.environ.update({
+        "OPENAI_BASE_URL": base_url,
+        "OPENAI_API_KEY": api_key,
+        "ASC_RETRIEVAL_BACKEND": args.backend,
+        "ASC_MANIFEST_PATH": os.path.join(workdir, "vector_store_manifest.json"),
+        "JOB_CACHE_PATH": os.path.join(workdir, "jobs.sqlite"),
+        "RESPONSE_CACHE_PATH": os.path.join(workdir, "responses.sqlite"),
+        "RESUME_CACHE_PATH": os.path.join(workdir, "resumes.sqlite"),
+        "SPAN_LOG_PATH": os.path.join(workdir, "agent_spans.jsonl"),
+    })
+
+    # Import after the environment is set; the modules read their paths at import time.
+    from agents import set_trace_processors
+    from utils.agents.tracing import MetricsTracingProcessor, SPAN_LOG_PATH, summarize_spans
+    from utils.openai_scheduler import get_openai_scheduler
+
+    # Keep the span log but skip exporting traces to the real OpenAI backend.
+    set_trace_processors([MetricsTracingProcessor()])
+
+    supabase = FakeSupabase(latency_seconds=args.supabase_latency_ms / 1000)
+    if args.resume:
+        with open(args.resume, "rb") as f:
+            resume_bytes = f.read()
+        resume_name = os.path.basename(args.resume)
+        resume_type = "application/pdf" if resume_name.lower().endswith(".pdf") else (
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+        )
+    else:
+        resume_bytes, resume_name, resume_type = make_sample_pdf(SAMPLE_RESUME_LINES), "sample.pdf", "application/pdf"
+
+    print(f"Benchmarking against {base_url} (work dir {workdir})")
+    timings = StageTimings()
+    started_at = datetime.now(timezone.utc)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [pool.submit(run_chat_session, i, api_key, supabase, timings) for i in range(args.sessions)]
+        futures += [
+            pool.submit(run_resume_session, i, api_key, supabase, resume_bytes, resume_name, resume_type, timings)
+            for i in range(args.resumes)
+        ]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "base_url": base_url,
+        "sessions": args.sessions,
+        "resumes": args.resumes,
+        "concurrency": args.concurrency,
+        "elapsed_seconds": round(elapsed, 2),
+        "sessions_per_second": round(args.sessions / elapsed, 2) if elapsed else None,
+        "resumes_per_second": round(args.resumes / elapsed, 2) if elapsed else None,
+        "stages": timings.summary(),
+        "spans": summarize_spans(SPAN_LOG_PATH, since=started_at),
+        "scheduler": get_openai_scheduler().metrics(),
+    }
+
+    print(f"\n{args.sessions} sessions and {args.resumes} resumes in {elapsed:.2f}s "
+          f"({report['sessions_per_second']} sessions/s, {report['resumes_per_second']} resumes/s)\n")
+    print_table(report["stages"], ["stage", "count", "errors", "p50_ms", "p95_ms", "max_ms"])
+    print()
+    print_table(report["spans"], ["kind", "name", "count", "errors", "p50_ms", "p95_ms", "input_tokens", "output_tokens"])
+    print(f"\nScheduler: {report['scheduler']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,25 +5,27 @@ setup_page_config()
 from app.chat_interface import render_chat_interface
 from app.sidebar_components import render_sidebar
 from app.competencies_component import render_competencies_assessment
-from supabase import create_client
+from app.admin_panel import is_admin, render_admin_metrics
 from dotenv import load_dotenv
-import os
+import uuid
+from utils.supabase_client import get_supabase_pool
 from utils.supabase_data_utils import fetch_saved_skills
 from utils.visualizer import create_svg_skills_visualization,categorize_skills
 
 load_dotenv()
 
 def get_user_supabase():
-    url = os.environ.get("SUPABASE_URL")
-    key = os.environ.get("SUPABASE_KEY")
-    client = create_client(url, key)
+    """Return this browser session's pooled Supabase client and auth session."""
+    if "supabase_client_id" not in st.session_state:
+        st.session_state.supabase_client_id = uuid.uuid4().hex
+    pooled = get_supabase_pool().session(st.session_state.supabase_client_id)
 
     if "supabase_session" in st.session_state:
-        client.auth.set_session(
+        pooled.attach(
             st.session_state.supabase_session["access_token"],
             st.session_state.supabase_session["refresh_token"]
         )
-    return client
+    return pooled
 
 def initialize_session_state():
     defaults = {
@@ -47,14 +49,19 @@ def main():
     apply_custom_css()
 
     try:
-        supabase = get_user_supabase()
+        pooled = get_user_supabase()
     except Exception as e:
+        # Stored tokens were rejected; forget them so the login form shows on the next run.
+        st.session_state.pop("supabase_session", None)
         st.error(f"Supabase connection failed: {e}")
         return
+    supabase = pooled.client
 
     try:
-        session = supabase.auth.get_session()
-        user_response = supabase.auth.get_user() if session else None
+        user_response = pooled.get_user()
+        if user_response:
+            # Keep refreshed tokens so a new worker or pool eviction can restore the session.
+            st.session_state.supabase_session = pooled.tokens()
     except Exception as e:
         st.error(f"Error checking Supabase session: {e}")
         user_response = None
@@ -71,12 +78,8 @@ def main():
                 password = st.text_input("Password", type="password")
                 if st.form_submit_button("Login"):
                     try:
-                        supabase = get_user_supabase()
-                        session = supabase.auth.sign_in_with_password({"email": email, "password": password})
-                        st.session_state.supabase_session = {
-                            "access_token": session.session.access_token,
-                            "refresh_token": session.session.refresh_token
-                        }
+                        pooled.sign_in(email, password)
+                        st.session_state.supabase_session = pooled.tokens()
                         st.success("Login successful!")
                         st.rerun()
                     except Exception as e:
@@ -97,7 +100,6 @@ def main():
                         st.warning("Password must be at least 8 characters.")
                     else:
                         try:
-                            supabase = get_user_supabase()
                             supabase.auth.sign_up({
                                 "email": email,
                                 "password": password,
@@ -135,11 +137,14 @@ def main():
         with st.sidebar:
             st.write(f"Logged in as: {user_name}")
             if st.button("Logout"):
-                supabase.auth.sign_out()
+                pooled.sign_out()
+                get_supabase_pool().discard(st.session_state.supabase_client_id)
                 st.session_state.clear()
                 st.rerun()
             st.divider()
             render_sidebar(supabase, user)
+            if is_admin(user):
+                render_admin_metrics()
 
         if st.session_state.get("show_skills_popup", False) and st.session_state.skills:
             st.markdown("<style>html, body { overflow: hidden !important; }</style>", unsafe_allow_html=True)
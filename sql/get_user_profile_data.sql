@@ -0,0 +1,46 @@
+-- sql/get_user_profile_data.sql
+-- A user's skills and competency ratings in one call, with a version stamp.
+-- Run once in the Supabase SQL editor. Called by utils/supabase_data_utils.py;
+-- until it exists the app falls back to one query per table.
+--
+-- version is an md5 of the returned rows. When the caller passes the version it
+-- already holds and nothing has changed, only {"version", "unchanged": true} is
+-- returned. security invoker keeps the tables' row level security in force.
+
+create or replace function public.get_user_profile_data(p_user_id uuid, p_known_version text default null)
+returns json
+language sql
+stable
+security invoker
+as $$
+  with skills as (
+    select coalesce(json_agg(json_build_object('skill', s.skill) order by s.skill), '[]'::json) as rows
+    from public.user_skills s
+    where s.user_id = p_user_id
+  ),
+  competencies as (
+    select coalesce(json_agg(to_json(c) order by c.competency_name), '[]'::json) as rows
+    from public.user_competencies c
+    where c.user_id = p_user_id
+  ),
+  profile as (
+    select skills.rows as skill_rows,
+           competencies.rows as competency_rows,
+           md5(skills.rows::text || competencies.rows::text) as version
+    from skills, competencies
+  )
+  select case
+    when version = p_known_version then
+      json_build_object('version', version, 'unchanged', true)
+    else
+      json_build_object(
+        'version', version,
+        'unchanged', false,
+        'user_skills', skill_rows,
+        'user_competencies', competency_rows
+      )
+  end
+  from profile;
+$$;
+
+grant execute on function public.get_user_profile_data(uuid, text) to authenticated;
@@ -0,0 +1,57 @@
+-- sql/user_profile_unique_keys.sql
+-- Unique keys that the batched skill and competency writes upsert against.
+-- Run once in the Supabase SQL editor. Used by bulk_upsert in
+-- utils/supabase_data_utils.py; until they exist the app falls back to a
+-- select followed by inserts and per-row updates.
+--
+-- Duplicate rows written before the keys existed are removed first. Duplicate
+-- skills are identical, so any one is kept. For competencies the row kept is
+-- the latest by updated_at, created_at or an integer id, whichever the table
+-- has first; without any of them an arbitrary row (and its rating) is kept.
+-- Safe to re-run.
+
+begin;
+
+delete from public.user_skills a
+using public.user_skills b
+where a.user_id = b.user_id
+  and a.skill = b.skill
+  and a.ctid < b.ctid;
+
+do $$
+declare
+  order_column text;
+begin
+  select column_name into order_column
+  from information_schema.columns
+  where table_schema = 'public'
+    and table_name = 'user_competencies'
+    and (column_name in ('updated_at', 'created_at')
+         or (column_name = 'id' and data_type in ('smallint', 'integer', 'bigint')))
+  order by array_position(array['updated_at', 'created_at', 'id'], column_name::text)
+  limit 1;
+
+  execute format(
+    'delete from public.user_competencies c
+     using (
+       select ctid, row_number() over (partition by user_id, competency_name %s) as position
+       from public.user_competencies
+     ) ranked
+     where c.ctid = ranked.ctid and ranked.position > 1',
+    case when order_column is null then '' else format('order by %I desc nulls last', order_column) end
+  );
+end $$;
+
+do $$
+begin
+  if not exists (select 1 from pg_constraint where conname = 'user_skills_user_id_skill_key') then
+    alter table public.user_skills
+      add constraint user_skills_user_id_skill_key unique (user_id, skill);
+  end if;
+  if not exists (select 1 from pg_constraint where conname = 'user_competencies_user_id_competency_name_key') then
+    alter table public.user_competencies
+      add constraint user_competencies_user_id_competency_name_key unique (user_id, competency_name);
+  end if;
+end $$;
+
+commit;
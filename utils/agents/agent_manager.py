@@ -1,17 +1,36 @@
 # utils/agents/agent_manager.py
 import re
 
-from openai import OpenAI
+from openai import NotFoundError, OpenAI, RateLimitError
 from agents import Agent, Runner, function_tool, FileSearchTool, WebSearchTool, RunContextWrapper,enable_verbose_stdout_logging
 
 import streamlit as st
+import asyncio
 import json
 import os
-import asyncio
-import concurrent.futures
-from utils.supabase_data_utils import get_user_skills, get_user_competencies
-
-enable_verbose_stdout_logging()
+import queue
+from typing import List
+from utils.agents.agent_runtime import get_agent_runtime
+from utils.agents.asc_search import search_asc_occupations
+from utils.agents.response_cache import fingerprint, get_response_cache, is_suggested_prompt, response_cache_key
+from utils.agents.intent_router import route_query
+from utils.agents.conversation_context import ConversationContext, make_summarizer
+from utils.agents.job_cache import JobListing, JobListings, format_listings, get_job_cache, job_cache_key
+from utils.agents.kb_sync import KnowledgeBaseSync, KB_TEXT_PATH, kb_sync_lock
+from utils.agents.vector_store_manifest import get_vector_store_manifest, manifest_key
+from utils.openai_scheduler import BACKGROUND, is_quota_error
+from utils.asc_data import ASC_KB_JSON_PATH, load_asc_knowledge_base
+from utils.agents.tracing import install_tracing
+from utils.supabase_data_utils import get_user_profile_data
+
+if os.environ.get("AGENTS_VERBOSE_LOGGING") == "1":
+    enable_verbose_stdout_logging()
+install_tracing()
+
+ASC_VECTOR_STORE_NAME = "ASC Knowledge Base V2"
+TRACE_WORKFLOW_NAME = "chatAussieGPT turn"
+# "file_search" uses the hosted vector store, "local" the offline BM25 index.
+ASC_RETRIEVAL_BACKEND = os.environ.get("ASC_RETRIEVAL_BACKEND", "file_search")
 
 
 class AgentManager:
@@ -23,25 +42,55 @@ class AgentManager:
             os.environ["OPENAI_API_KEY"] = api_key
         self.client = None
         self.triage_agent = None
+        self.job_refresh_agent = None
         self.agents = {}
         self.supabase_client =  supabase
         self.user = user
+        self.vector_store_id = st.session_state.get("vector_store_id")
+        self.conversation = ConversationContext()
 
 
 
 
-    def get_user_profile(self, context: RunContextWrapper) -> str:
+    async def get_user_profile(self, context: RunContextWrapper) -> str:
         """Get user skills and competencies from the  database."""
+        turn_context = context.context if isinstance(context.context, dict) else {}
+        if "user_profile" not in turn_context:
+            # Supabase calls block, so keep them off the shared agent loop.
+            turn_context["user_profile"] = await asyncio.to_thread(self.get_cached_profile)
+        return turn_context["user_profile"]
+
+    def get_cached_profile(self, with_status=False):
+        """
+        Return the formatted user profile. The rows come from the shared per-user
+        cache in supabase_data_utils, so every reader sees the same data.
+
+        With with_status=True, returns (profile_text, ok) instead.
+        """
+        if not self.supabase_client or not self.user:
+            profile_text, ok = "Error: Unable to access user database context.", False
+            return (profile_text, ok) if with_status else profile_text
+
+        profile_text, ok, _ = self._fetch_profile_text()
+        return (profile_text, ok) if with_status else profile_text
+
+    def get_cached_skills(self):
+        """Return the user's skills list from the shared per-user cache."""
+        if not self.supabase_client or not self.user:
+            return []
+        _, ok, skills = self._fetch_profile_text()
+        return list(skills) if ok else []
+
+    def _fetch_profile_text(self):
+        """Fetch and format the user profile from Supabase. Returns (profile_text, ok, skills)."""
         profile_text = "User Profile Data:\n"
         skills = []
         competencies = {}
 
-        if not self.supabase_client or not self.user:
-            return "Error: Unable to access user database context."
-
         try:
-            skills = get_user_skills(self.supabase_client, self.user)
-            competencies = get_user_competencies(self.supabase_client, self.user)
+            profile = get_user_profile_data(self.supabase_client, self.user.id)
+            skills = profile["skills"]
+            competencies = profile["competencies"]
 
             profile_text += f"- Skills: {', '.join(skills) if skills else 'No skills found.'}\n"
             profile_text += "- Core Competencies:\n"
@@ -54,8 +103,9 @@ class AgentManager:
         except Exception as e:
             print(f"Error fetching profile data from Supabase: {e}")
             profile_text += "Error fetching profile data."
+            return profile_text, False, []
 
-        return profile_text
+        return profile_text, True, skills
 
     def _ensure_client(self):
         """Ensure the OpenAI client is initialized with the API key"""
@@ -79,7 +129,8 @@ class AgentManager:
         """Initialize all agents in the system"""
         if not self._ensure_client():
             return None
-        self.set_asc_vector_store()
+        if ASC_RETRIEVAL_BACKEND != "local" and not self.set_asc_vector_store():
+            return None
 
         if self.triage_agent:
             return self.triage_agent
@@ -87,6 +138,7 @@ class AgentManager:
         try:
             self.agents["asc_retrieval"] = self._create_asc_retrieval_agent()
             self.agents["job_search"] = self._create_job_search_agent()
+            self.job_refresh_agent = self._create_job_refresh_agent()
 
             self.triage_agent = self._create_triage_agent([
                 self.agents["asc_retrieval"],
@@ -103,7 +155,10 @@ class AgentManager:
 
     def _create_asc_retrieval_agent(self):
         """Create agent for ASC knowledge retrieval"""
-
+        if ASC_RETRIEVAL_BACKEND == "local":
+            retrieval_tool = search_asc_occupations
+        else:
+            retrieval_tool = FileSearchTool(vector_store_ids=[self.vector_store_id])
 
         return Agent(
             name="ASC Career Recommendations",
@@ -112,7 +167,7 @@ class AgentManager:
 
 Your purpose is to provide ONLY accurate and verified career recommendations based on users' skills and competencies. You must NEVER generate or recommend careers that are not explicitly found in the ASC knowledge base.
 
-When using the FileSearchTool:
+When using your ASC search tool:
 1. Search for detailed information about occupations from the ASC database
 2. ONLY recommend occupations that you can directly cite from search results
 3. If search returns no relevant results, explicitly state "I couldn't find matching occupations in the ASC knowledge base" rather than creating approximations
@@ -132,7 +187,7 @@ When there are no jobs related to the user's query, clearly state that you could
             """,
             tools=[
                 function_tool(self.get_user_profile),
-                FileSearchTool(vector_store_ids=[st.session_state.vector_store.id])
+                retrieval_tool
             ]
 
         )
@@ -185,15 +240,104 @@ When there are no jobs related to the user's query, clearly state that you could
 
         ---
 
+        ### Job listing cache:
+
+        - Before searching the web, call `lookup_cached_jobs` with the location (use "Australia" if none was given)
+          and the role: the job title or keywords the user asked for, in a few words (e.g. "registered nurse",
+          "junior data analyst"). Pass an empty role only when the user wants jobs matching their own skills.
+        - If it returns listings that fit the request, answer from them and do not search the web.
+        - If nothing is cached, or the cached listings don't fit what the user asked for, use the web search
+          tool, then call `save_job_listings` with the same location and role and every job you are going to
+          show the user, before answering.
+
+        ---
+
         Your tone should be professional, supportive, and grounded in real opportunities.
         Use the web search tool to look for live job openings from reputable sources like Seek, LinkedIn, Indeed, and others.
         """,
         tools=[
             function_tool(self.get_user_profile),
+            function_tool(self.lookup_cached_jobs),
+            function_tool(self.save_job_listings),
             WebSearchTool()
         ]
     )
 
+    def _create_job_refresh_agent(self):
+        """Create the background agent that refreshes cached job listings"""
+        return Agent(
+            name="Job Listings Refresher",
+            model="gpt-4o",
+            instructions="""
+        Use the web search tool to find live, unexpired job listings in the given location for the given role, or
+        matching the given skills when no role is given.
+        Prefer reputable sources like Seek, LinkedIn and Indeed. Skip anything marked closed, expired or no longer advertised.
+        NEVER fabricate jobs. Return only listings you found in the search results, with salary, link and a 1–2 sentence
+        summary when available.
+        """,
+            tools=[WebSearchTool()],
+            output_type=JobListings,
+        )
+
+    async def lookup_cached_jobs(self, context: RunContextWrapper, location: str, role: str) -> str:
+        """Look up recently found job listings for a role, or matching the user's skills, in a location.
+
+        Args:
+            location: City or region to search in, or "Australia" when the user gave none.
+            role: Job title or keywords the user asked for, or "" for jobs matching the user's skills.
+        """
+        skills = await asyncio.to_thread(self.get_cached_skills)
+        cache_key = job_cache_key(skills, location, role)
+        listings, fresh = await asyncio.to_thread(get_job_cache().get, cache_key)
+
+        searched = f"{role or 'this profile'} in {location}"
+        if listings is None:
+            return f"No cached job listings for {searched}. Search the web, then call save_job_listings."
+
+        if not fresh:
+            get_agent_runtime().submit(self._refresh_jobs(cache_key, skills, location, role))
+
+        if not listings:
+            return f"A recent search found no current listings for {searched}."
+        return f"Job listings found in recent searches for {searched}:\n{format_listings(listings)}"
+
+    async def save_job_listings(self, context: RunContextWrapper, location: str, role: str,
+                                jobs: List[JobListing]) -> str:
+        """Save job listings found by web search so later questions can be answered without searching again.
+
+        Args:
+            location: The location that was searched, as passed to lookup_cached_jobs.
+            role: The role that was searched, as passed to lookup_cached_jobs.
+            jobs: The job listings found in the search results.
+        """
+        skills = await asyncio.to_thread(self.get_cached_skills)
+        await asyncio.to_thread(
+            get_job_cache().put, job_cache_key(skills, location, role), skills, location, jobs, role
+        )
+        return f"Saved {len(jobs)} job listing(s)."
+
+    async def _refresh_jobs(self, cache_key, skills, location, role=""):
+        """Re-run the job search in the background and replace the cached listings."""
+        if not await asyncio.to_thread(get_job_cache().claim_refresh, cache_key):
+            return
+        try:
+            result = await Runner.run(
+                starting_agent=self.job_refresh_agent,
+                input=(
+                    f"Location: {location}\nRole: {role}" if role
+                    else f"Location: {location}\nSkills: {', '.join(skills) if skills else 'not specified'}"
+                ),
+                run_config=get_agent_runtime().get_run_config(
+                    self.api_key, priority=BACKGROUND, workflow_name="Job listings refresh"
+                ),
+            )
+            await asyncio.to_thread(
+                get_job_cache().put, cache_key, skills, location, result.final_output.jobs, role
+            )
+            print(f"Refreshed {len(result.final_output.jobs)} cached job listing(s) for {location}")
+        except Exception as e:
+            print(f"Background job refresh failed: {e}")
+
 
 
     def _create_triage_agent(self, specialized_agents):
@@ -231,98 +375,112 @@ When there are no jobs related to the user's query, clearly state that you could
 
         )
 
-    def set_asc_vector_store(self):
-        """Setting ASC knowledge base"""
+    def set_asc_vector_store(self, revalidate=False):
+        """
+        Resolve the ASC knowledge base vector store, creating it if needed.
+
+        A fresh entry in the shared vector store manifest is used without any
+        listing calls. Otherwise the store is looked up and incrementally synced
+        with the local knowledge base files. Pass revalidate=True to ignore the
+        manifest and check the store against the OpenAI API.
+        """
         print("In set_asc_vector_store ")
 
         if not self._ensure_client():
             return None
 
-        vector_store = st.session_state.get("vector_store", None)
+        manifest = get_vector_store_manifest()
+        key = self._manifest_key()
+
+        if self.vector_store_id and not revalidate:
+            return self.vector_store_id
+
+        entry = None if revalidate else manifest.get(key)
+        if entry:
+            print("ASC Occupation Knowledge Base resolved from manifest.")
+            self.vector_store_id = entry["vector_store_id"]
+            st.session_state["vector_store_id"] = self.vector_store_id
+            return self.vector_store_id
 
         try:
-            if not vector_store:
+            with kb_sync_lock():
+                # Another session may have finished the sync while this one waited for the lock.
+                entry = None if revalidate else manifest.get(key)
+                if entry:
+                    self.vector_store_id = entry["vector_store_id"]
+                    st.session_state["vector_store_id"] = self.vector_store_id
+                    return self.vector_store_id
+
+                vector_store = None
                 print("Checking vector stores... ")
-                vector_stores = self.client.vector_stores.list()
-
-                if vector_stores and vector_stores.data:
-                    print("Vector Stores Present... ")
-                    for vs in vector_stores.data:
-                        if vs.name == 'ASC Knowledge Base V2':
-                            print("ASC Occupation Knowledge Base Vector Found.")
-                            vector_store = vs
-                            st.session_state["vector_store"] = vector_store
-                            break
+                for vs in self.client.vector_stores.list():
+                    if vs.name == ASC_VECTOR_STORE_NAME:
+                        print("ASC Occupation Knowledge Base Vector Found.")
+                        vector_store = vs
+                        break
 
                 if not vector_store:
                     print("No existing ASC Occupation Knowledge Base vector store found. Creating new one...")
-                    vector_store = self.client.vector_stores.create(name="ASC Knowledge Base V2")
-                    st.session_state["vector_store"] = vector_store
+                    vector_store = self.client.vector_stores.create(name=ASC_VECTOR_STORE_NAME)
                     print(f"Created vector store with ID: {vector_store.id}")
 
-            vector_store = st.session_state["vector_store"]
-
-            existing_files = self.client.vector_stores.files.list(vector_store_id=vector_store.id)
-            print("Existing Files in Vector Store  - ", existing_files)
+                if os.path.exists(ASC_KB_JSON_PATH):
+                    self._convert_json_to_text_kb(ASC_KB_JSON_PATH)
 
+                previous = manifest.get(key, allow_stale=True)
+                recorded_files = previous.get("files") if previous and previous["vector_store_id"] == vector_store.id else None
+                files, complete = KnowledgeBaseSync(self.client, vector_store.id).run(recorded_files, with_status=True)
+                manifest.put(key, vector_store.id, vector_store.name, files, complete=complete)
 
-            if not existing_files or len(existing_files.data) <= 2:
-                print("No files found or less than 3 files found in vector store. Uploading...")
-
-                kb_text_path = 'data/files'
-                os.makedirs(kb_text_path, exist_ok=True)
-
-                if not os.path.exists(kb_text_path) or not any(
-                        os.path.isfile(os.path.join(kb_text_path, f)) for f in os.listdir(kb_text_path)):
-                    print("Converting JSON to text files...")
-                    self._convert_json_to_text_kb("data/asc_knowledge_base.json")
-
-                files_to_upload = []
-                file_count = 0
-                for filename in os.listdir(kb_text_path):
-                    file_path = os.path.join(kb_text_path, filename)
-                    if os.path.exists(file_path):
-                        with open(file_path, "rb") as file:
-                            # Upload the file to the vector store
-                            print(f"Uploading file: {filename} to Vector Store: {vector_store.name}")
-                            file_batch = self.client.vector_stores.file_batches.upload_and_poll(
-                                vector_store_id=vector_store.id,
-                                files=[file]
-                            )
-                            file_count += 1
-                            print(f"File upload completed: {filename}")
-                            print(f"Total files uploaded: {file_count}")
-                            print(file_batch.status)
-                            print(file_batch.file_counts)
-
-                print(f"Upload complete. Total files uploaded: {file_count}")
-
-
-            else:
-                print(f"Vector store already has more than {len(existing_files.data)} file(s). Skipping upload.")
+                self.vector_store_id = vector_store.id
+                st.session_state["vector_store_id"] = self.vector_store_id
+                return self.vector_store_id
 
         except Exception as e:
             print(f"Error creating/checking for vector store: {e}")
+            if isinstance(e, NotFoundError):
+                # The recorded store (or one of its files) is gone; don't keep serving it from the manifest.
+                manifest.invalidate(key)
             st.error(f"Failed to create/check vector store: {str(e)}")
             return None
 
+    def _manifest_key(self):
+        # Vector stores belong to the organization, so keys from different orgs must not collide.
+        return manifest_key(self.api_key, self.client.organization if self.client else None)
+
+    def _is_missing_vector_store(self, error):
+        """True when a run failed because the ASC vector store no longer exists."""
+        message = str(error).lower()
+        return (
+            ASC_RETRIEVAL_BACKEND != "local"
+            and isinstance(error, NotFoundError)
+            and "vector" in message
+            and "not found" in message
+        )
 
-
+    def _forget_vector_store(self):
+        """
+        Drop the vector store from the manifest and this session so the next
+        query resolves (or recreates) it. Safe to call off the script thread;
+        callers on it also clear st.session_state["vector_store_id"].
+        """
+        get_vector_store_manifest().invalidate(self._manifest_key())
+        self.vector_store_id = None
+        self.triage_agent = None
+        self.job_refresh_agent = None
+        self.agents = {}
 
 
 
     @staticmethod
     def _convert_json_to_text_kb(json_path):
         """Convert JSON knowledge base to text format for each occupation and save it in data folder"""
-        try:
-            with open(json_path, 'r') as f:
-                data = json.load(f)
-                kb_entries = data if isinstance(data, list) else [data]
-        except Exception as e:
-            print(f"Error loading JSON file: {e}")
+        kb_entries = load_asc_knowledge_base(json_path)
+        if not kb_entries:
             return
 
-        os.makedirs("data/files", exist_ok=True)
+        os.makedirs(KB_TEXT_PATH, exist_ok=True)
+        current_files = set()
         for entry in kb_entries:
             metadata = entry.get("metadata", {})
             anzsco_code = metadata.get("anzsco_code", "Unknown")
@@ -355,26 +513,34 @@ When there are no jobs related to the user's query, clearly state that you could
 """
 
             safe_title = re.sub(r'[\\/:"*?<>|]+', '_', title)
-            output_path = f"data/files/{safe_title}_{anzsco_code}.txt"
+            output_path = os.path.join(KB_TEXT_PATH, f"{safe_title}_{anzsco_code}.txt")
+            current_files.add(os.path.basename(output_path))
             if os.path.exists(output_path):
-                print(f"Skipping file creation, file already exists: {output_path}")
-                continue
+                with open(output_path, 'r') as f:
+                    if f.read() == text_entry:
+                        continue
             with open(output_path, 'w') as f:
                 f.write(text_entry)
 
+        # Occupations dropped from the knowledge base lose their text file, so the sync removes them from the store.
+        for filename in os.listdir(KB_TEXT_PATH):
+            if filename.endswith(".txt") and filename not in current_files:
+                os.remove(os.path.join(KB_TEXT_PATH, filename))
+
 
-    def process_user_query(self, user_query):
+    def process_user_query(self, user_query, messages=None):
         """
         Process user query through the agent system and return the response.
 
         Args:
             user_query: User's input text
+            messages: Chat history to use instead of st.session_state.messages
 
         Returns:
             str: Generated response
         """
         os.environ["OPENAI_API_KEY"] = self.api_key
-        chat_context = {"messages": st.session_state.messages}
+        chat_context = {"messages": list(st.session_state.messages if messages is None else messages)}
         if not self.triage_agent:
             if not self.initialize_agents():
                 return "I couldn't initialize the career guidance system. Please check your API key in the sidebar."
@@ -382,27 +548,176 @@ When there are no jobs related to the user's query, clearly state that you could
         if not self._ensure_client():
             return "Error: Unable to process your request. Please make sure you've entered a valid OpenAI API key in the sidebar."
 
-        def run_async_in_thread():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                result = loop.run_until_complete(
-                    Runner.run(
-                        starting_agent=self.triage_agent,
-                        input=user_query,
-                        context= chat_context,
-                    )
-                )
-                return result.final_output
-            except Exception as e:
-                error_msg = str(e)
-                print(f"Error in thread: {error_msg}")
-                if "insufficient_quota" in error_msg:
-                    return "Sorry, I can't process your request right now. The API quota has been reached. Please update your API key in settings or try again later."
-                return f"I encountered an issue while processing your request: {error_msg}"
-            finally:
-                loop.close()
-
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(run_async_in_thread)
-            return future.result()
+        cache_key = self._response_cache_key(user_query, chat_context)
+        if cache_key:
+            cached = get_response_cache().get(cache_key)
+            if cached:
+                return cached
+
+        try:
+            response = get_agent_runtime().submit(self._run(user_query, chat_context)).result()
+        except Exception as e:
+            print(f"Error in agent run: {e}")
+            if self._is_missing_vector_store(e):
+                self._forget_vector_store()
+                st.session_state.pop("vector_store_id", None)
+            return self._format_run_error(e)
+
+        if cache_key and response:
+            get_response_cache().put(cache_key, self.user.id, response)
+        return response
+
+    async def _run(self, user_query, chat_context):
+        """Run the agent system to completion on the shared runtime loop."""
+        result = await Runner.run(
+            starting_agent=self._select_starting_agent(user_query),
+            input=self._build_run_input(user_query, chat_context),
+            context=chat_context,
+            run_config=get_agent_runtime().get_run_config(self.api_key, workflow_name=TRACE_WORKFLOW_NAME),
+        )
+        return result.final_output
+
+    def stream_user_query(self, user_query, messages=None):
+        """
+        Stream the agent system's response to a user query as it is generated.
+
+        Args:
+            user_query: User's input text
+            messages: Chat history to use instead of st.session_state.messages
+
+        Yields:
+            dict: Events with a "type" key:
+                - "text": {"delta": str} chunk of the final answer
+                - "handoff": {"agent": str} control moved to another agent
+                - "tool_call": {"agent": str, "tool": str} an agent invoked a tool
+                - "error": {"content": str} user-facing error message
+        """
+        os.environ["OPENAI_API_KEY"] = self.api_key
+        chat_context = {"messages": list(st.session_state.messages if messages is None else messages)}
+        if not self.triage_agent:
+            if not self.initialize_agents():
+                yield {"type": "error", "content": "I couldn't initialize the career guidance system. Please check your API key in the sidebar."}
+                return
+
+        if not self._ensure_client():
+            yield {"type": "error", "content": "Error: Unable to process your request. Please make sure you've entered a valid OpenAI API key in the sidebar."}
+            return
+
+        cache_key = self._response_cache_key(user_query, chat_context)
+        if cache_key:
+            cached = get_response_cache().get(cache_key)
+            if cached:
+                yield {"type": "text", "delta": cached}
+                return
+
+        events = queue.Queue()
+
+        def on_done(future):
+            error = future.exception() if not future.cancelled() else RuntimeError("The agent run was cancelled.")
+            if error:
+                print(f"Error in streamed agent run: {error}")
+                if self._is_missing_vector_store(error):
+                    self._forget_vector_store()
+                events.put({"type": "error", "content": self._format_run_error(error)})
+            elif cache_key and future.result():
+                get_response_cache().put(cache_key, self.user.id, future.result())
+            events.put(None)
+
+        runtime = get_agent_runtime()
+        runtime.submit(self._stream_events(user_query, chat_context, events.put)).add_done_callback(on_done)
+
+        while True:
+            event = events.get()
+            if event is None:
+                break
+            yield event
+
+        if self.vector_store_id is None:
+            st.session_state.pop("vector_store_id", None)
+
+    async def _stream_events(self, user_query, chat_context, emit):
+        """
+        Run the agent system with the streamed runner on the shared runtime loop
+        and translate SDK events for the UI. Returns the final output.
+        """
+        starting_agent = self._select_starting_agent(user_query)
+        result = Runner.run_streamed(
+            starting_agent=starting_agent,
+            input=self._build_run_input(user_query, chat_context),
+            context=chat_context,
+            run_config=get_agent_runtime().get_run_config(self.api_key, workflow_name=TRACE_WORKFLOW_NAME),
+        )
+
+        current_agent = starting_agent.name
+        if starting_agent is not self.triage_agent:
+            emit({"type": "handoff", "agent": current_agent})
+        async for event in result.stream_events():
+            if event.type == "raw_response_event":
+                if getattr(event.data, "type", None) == "response.output_text.delta":
+                    emit({"type": "text", "delta": event.data.delta})
+
+            elif event.type == "agent_updated_stream_event":
+                if event.new_agent.name != current_agent:
+                    current_agent = event.new_agent.name
+                    emit({"type": "handoff", "agent": current_agent})
+
+            elif event.type == "run_item_stream_event" and event.item.type == "tool_call_item":
+                raw_item = event.item.raw_item
+                tool_name = getattr(raw_item, "name", None) or getattr(raw_item, "type", "tool")
+                emit({"type": "tool_call", "agent": current_agent, "tool": tool_name})
+
+        return result.final_output
+
+    def _select_starting_agent(self, user_query):
+        """Skip the triage hop when the local intent router is confident about the target agent."""
+        route, confidence, reason = route_query(user_query)
+        agent = self.agents.get(route, self.triage_agent)
+        print(f"Intent router: {agent.name} (route={route}, confidence={confidence:.2f}, reason={reason})")
+        return agent
+
+    def _build_run_input(self, user_query, chat_context):
+        """
+        Build the token-budgeted conversation input (summary, recent turns, current query).
+        Suggested prompts run without history so their cached answers never repeat earlier turns.
+        """
+        if is_suggested_prompt(user_query):
+            return [{"role": "user", "content": user_query}]
+        history = list(chat_context["messages"])
+        if history and history[-1]["role"] == "user" and history[-1]["content"] == user_query:
+            history = history[:-1]
+        summarizer = make_summarizer(get_agent_runtime().get_openai_client(self.api_key), self.api_key)
+        return self.conversation.build_input(history, user_query, summarizer)
+
+    def _response_cache_key(self, user_query, chat_context):
+        """
+        Return the response cache key for the query, or None when the model input
+        includes earlier turns. Suggested prompts run without history (see
+        _build_run_input), so they are cacheable mid-conversation too.
+        """
+        previous_user_turns = [m for m in chat_context["messages"] if m["role"] == "user"][:-1]
+        if previous_user_turns and not is_suggested_prompt(user_query):
+            return None
+
+        profile_text, ok = self.get_cached_profile(with_status=True)
+        if not ok:
+            return None
+        chat_context["user_profile"] = profile_text
+        return response_cache_key(user_query, self.user.id, profile_text, self._config_fingerprint())
+
+    def _config_fingerprint(self):
+        """Fingerprint of everything about the agent setup that can change an answer."""
+        agents = [self.triage_agent, *self.agents.values()]
+        return fingerprint(json.dumps(
+            [[agent.name, str(agent.model), agent.instructions] for agent in agents]
+            + [ASC_RETRIEVAL_BACKEND, self.vector_store_id]
+        ))
+
+    @staticmethod
+    def _format_run_error(error):
+        """Turn an exception raised during an agent run into a user-facing message."""
+        error_msg = str(error)
+        if is_quota_error(error):
+            return "Sorry, I can't process your request right now. The API quota has been reached. Please update your API key in settings or try again later."
+        if isinstance(error, RateLimitError):
+            return "The career guidance service is very busy right now. Please try again in a minute."
+        return f"I encountered an issue while processing your request: {error_msg}"
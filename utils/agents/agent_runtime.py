@@ -0,0 +1,167 @@
+# utils/agents/agent_runtime.py
+import asyncio
+import atexit
+import hashlib
+import threading
+
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, RateLimitError
+import httpx
+from agents import Model, ModelProvider, OpenAIProvider, RunConfig
+
+from utils.openai_scheduler import INTERACTIVE, estimate_tokens, get_openai_scheduler
+
+# Output allowance added to the input estimate when admitting an agent model call.
+AGENT_OUTPUT_TOKEN_ESTIMATE = 1000
+
+
+class ScheduledModel(Model):
+    """Wraps an Agents SDK model so every call is admitted by the shared OpenAI scheduler."""
+
+    def __init__(self, model, model_name, api_key, priority):
+        self._model = model
+        self._model_name = model_name
+        self._api_key = api_key
+        self._priority = priority
+
+    def _estimate(self, args, kwargs):
+        system_instructions = kwargs.get("system_instructions", args[0] if args else None) or ""
+        model_input = kwargs.get("input", args[1] if len(args) > 1 else "")
+        return estimate_tokens(f"{system_instructions}{model_input}", AGENT_OUTPUT_TOKEN_ESTIMATE)
+
+    async def get_response(self, *args, **kwargs):
+        return await get_openai_scheduler().call_async(
+            lambda: self._model.get_response(*args, **kwargs),
+            model=self._model_name,
+            estimated_tokens=self._estimate(args, kwargs),
+            priority=self._priority,
+            api_key=self._api_key,
+        )
+
+    async def stream_response(self, *args, **kwargs):
+        scheduler = get_openai_scheduler()
+        estimated_tokens = self._estimate(args, kwargs)
+        attempt = 0
+        while True:
+            await scheduler.acquire_async(self._model_name, estimated_tokens, self._priority, self._api_key)
+            started = False
+            try:
+                async for event in self._model.stream_response(*args, **kwargs):
+                    started = True
+                    yield event
+                return
+            except RateLimitError as e:
+                # Events already sent cannot be taken back, so only retry before the first one.
+                if started:
+                    raise
+                await asyncio.sleep(scheduler.backoff_after_rate_limit(self._model_name, self._api_key, e, attempt))
+                attempt += 1
+
+
+class ScheduledModelProvider(ModelProvider):
+    def __init__(self, provider, api_key, priority):
+        self._provider = provider
+        self._api_key = api_key
+        self._priority = priority
+
+    def get_model(self, model_name):
+        return ScheduledModel(self._provider.get_model(model_name), model_name, self._api_key, self._priority)
+
+
+class AgentRuntime:
+    """
+    Process-wide execution service for agent runs.
+
+    Owns one long-lived asyncio event loop on a dedicated thread and one pooled
+    HTTP transport to OpenAI. Streamlit sessions submit coroutines with
+    `submit` and receive concurrent futures back, so runs from many sessions
+    overlap on the same loop and reuse warm TLS connections.
+    """
+
+    def __init__(self, max_connections=100, max_keepalive_connections=20):
+        self._loop = asyncio.new_event_loop()
+        self._http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            )
+        )
+        self._clients = {}
+        self._providers = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run_loop, name="agent-runtime", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    @property
+    def loop(self):
+        return self._loop
+
+    def submit(self, coro):
+        """
+        Schedule a coroutine on the runtime loop.
+
+        Returns:
+            concurrent.futures.Future: Resolves with the coroutine's result
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def get_openai_client(self, api_key):
+        """
+        Return an AsyncOpenAI client for the API key that shares the pooled HTTP
+        transport. SDK retries are disabled so rate-limited calls are retried only
+        by the scheduler, against its token buckets.
+        """
+        key = hashlib.sha256(api_key.encode()).hexdigest()
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                # Calls on this client go through the OpenAI scheduler, whose backoff is the only retry path.
+                client = AsyncOpenAI(api_key=api_key, http_client=self._http_client, max_retries=0)
+                self._clients[key] = client
+            return client
+
+    def get_model_provider(self, api_key, priority=INTERACTIVE):
+        """
+        Return a model provider for the API key that shares the pooled HTTP
+        transport and admits calls through the OpenAI scheduler at the given priority.
+        """
+        client = self.get_openai_client(api_key)
+        with self._lock:
+            provider = self._providers.get((id(client), priority))
+            if provider is None:
+                provider = ScheduledModelProvider(OpenAIProvider(openai_client=client), api_key, priority)
+                self._providers[(id(client), priority)] = provider
+            return provider
+
+    def get_run_config(self, api_key, priority=INTERACTIVE, **kwargs):
+        """Build a RunConfig that routes model calls through the pooled transport and scheduler."""
+        return RunConfig(model_provider=self.get_model_provider(api_key, priority), **kwargs)
+
+    def shutdown(self):
+        """Close pooled connections and stop the loop."""
+        if not self._loop.is_running():
+            return
+        try:
+            self.submit(self._http_client.aclose()).result(timeout=5)
+        except Exception as e:
+            print(f"Error closing agent runtime HTTP client: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+_runtime = None
+_runtime_lock = threading.Lock()
+
+
+def get_agent_runtime():
+    """Return the process-wide AgentRuntime, starting it on first use."""
+    global _runtime
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = AgentRuntime()
+                atexit.register(_runtime.shutdown)
+    return _runtime
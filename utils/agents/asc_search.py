@@ -0,0 +1,240 @@
+# utils/agents/asc_search.py
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from agents import function_tool
+
+from utils.asc_data import ASC_KB_JSON_PATH, load_asc_knowledge_base
+
+ASC_INDEX_PATH = os.environ.get("ASC_INDEX_PATH", "data/cache/asc_bm25_index.json")
+# Bumped when the persisted document fields change, so older index files are rebuilt.
+ASC_INDEX_FORMAT = 2
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "into", "is", "it",
+    "of", "on", "or", "that", "the", "to", "with", "i", "me", "my", "what", "which", "who",
+    "job", "jobs", "career", "careers", "occupation", "occupations",
+}
+
+# Title and tool matches say more about an occupation than a passing mention in a task.
+FIELD_WEIGHTS = {
+    "title": 3,
+    "technology_tools": 2,
+    "description": 1,
+    "specialist_tasks": 1,
+    "core_competencies": 1,
+}
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def _competency_names(entry):
+    return [
+        comp.get("name", "")
+        for comp in entry.get("metadata", {}).get("core_competencies", []) if comp.get("name", "")
+    ]
+
+
+def _occupation_fields(entry):
+    """Display fields for an occupation, worded like the hosted knowledge base files."""
+    metadata = entry.get("metadata", {})
+    competencies = [
+        f"{comp.get('name', '')}: {comp.get('level', '')} (score: {comp.get('score', '')})"
+        for comp in metadata.get("core_competencies", []) if comp.get("name", "")
+    ]
+    return {
+        "title": metadata.get("title", "Unknown Title"),
+        "anzsco_code": metadata.get("anzsco_code", "Unknown"),
+        "description": metadata.get("description", ""),
+        "core_competencies": competencies,
+        "specialist_tasks": metadata.get("specialist_tasks", []),
+        "technology_tools": metadata.get("technology_tools", []),
+    }
+
+
+class BM25Index:
+    """
+    Tokenized inverted index over ASC occupations with Okapi BM25 scoring.
+    """
+
+    def __init__(self, documents, postings, doc_lengths, source_hash=None, k1=1.5, b=0.75):
+        self.documents = documents
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+        self.source_hash = source_hash
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = sum(doc_lengths) / len(doc_lengths) if doc_lengths else 0.0
+        n_docs = len(documents)
+        self.idf = {
+            term: math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for term, posting in postings.items()
+        }
+        self._length_norms = [
+            k1 * (1 - b + b * length / self.avg_doc_length) for length in doc_lengths
+        ]
+
+    @classmethod
+    def build(cls, entries, source_hash=None):
+        documents, postings, doc_lengths = [], {}, []
+        for doc_id, entry in enumerate(entries):
+            fields = _occupation_fields(entry)
+            # Competencies are matched by name; their levels and scores are only displayed.
+            indexed = dict(fields, core_competencies=_competency_names(entry))
+            term_counts = Counter()
+            for field, weight in FIELD_WEIGHTS.items():
+                value = indexed[field]
+                text = " ".join(value) if isinstance(value, list) else value
+                for token in tokenize(text):
+                    term_counts[token] += weight
+
+            for term, tf in term_counts.items():
+                postings.setdefault(term, []).append([doc_id, tf])
+            documents.append(fields)
+            doc_lengths.append(sum(term_counts.values()))
+        return cls(documents, postings, doc_lengths, source_hash=source_hash)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "format": ASC_INDEX_FORMAT,
+                "source_hash": self.source_hash,
+                "k1": self.k1,
+                "b": self.b,
+                "documents": self.documents,
+                "postings": self.postings,
+                "doc_lengths": self.doc_lengths,
+            }, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("format") != ASC_INDEX_FORMAT:
+            raise ValueError(f"index format {data.get('format')}, expected {ASC_INDEX_FORMAT}")
+        return cls(data["documents"], data["postings"], data["doc_lengths"],
+                   source_hash=data.get("source_hash"), k1=data["k1"], b=data["b"])
+
+    def search(self, query, top_k=5):
+        """
+        Score occupations against the query.
+
+        Returns:
+            list: (score, occupation fields) pairs, best first
+        """
+        scores = {}
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[term]:
+                norm = self._length_norms[doc_id]
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [(score, self.documents[doc_id]) for doc_id, score in ranked]
+
+
+def _hash_source(json_path):
+    digest = hashlib.sha256()
+    with open(json_path, "rb") as f:
+        for block in iter(lambda: f.read(65536), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+_index = None
+_index_mtime = None
+_index_lock = threading.Lock()
+
+
+def get_asc_index(json_path=ASC_KB_JSON_PATH, index_path=ASC_INDEX_PATH):
+    """
+    Return the process-wide BM25 index, loading it from disk or rebuilding it
+    when the knowledge base JSON has changed since it was persisted.
+    """
+    global _index, _index_mtime
+    with _index_lock:
+        if not os.path.exists(json_path):
+            return _index
+        mtime = os.path.getmtime(json_path)
+        if _index is not None and _index_mtime == mtime:
+            return _index
+
+        source_hash = _hash_source(json_path)
+        _index_mtime = mtime
+        if _index is not None and _index.source_hash == source_hash:
+            return _index
+
+        if os.path.exists(index_path):
+            try:
+                index = BM25Index.load(index_path)
+                if index.source_hash == source_hash:
+                    _index = index
+                    return _index
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Rebuilding unreadable ASC index {index_path}: {e}")
+
+        print("Building local ASC BM25 index...")
+        _index = BM25Index.build(load_asc_knowledge_base(json_path), source_hash=source_hash)
+        _index.save(index_path)
+        return _index
+
+
+def format_occupation(occupation):
+    return f"""# {occupation['title']} (ANZSCO: {occupation['anzsco_code']})
+
+## Description
+{occupation['description']}
+
+## Required Core Competencies
+{', '.join(occupation['core_competencies'])}
+
+## Specialized Tasks
+{', '.join(occupation['specialist_tasks'])}
+
+## Technology Tools
+{', '.join(occupation['technology_tools'])}
+"""
+
+
+@function_tool
+def search_asc_occupations(query: str, top_k: int = 5) -> str:
+    """Search the local ASC knowledge base for occupations relevant to the query.
+
+    Args:
+        query: Skills, tools, tasks or job titles to search for.
+        top_k: Maximum number of occupations to return.
+    """
+    index = get_asc_index()
+    if index is None:
+        return "The ASC knowledge base is not available."
+
+    results = index.search(query, top_k=max(1, min(top_k, 20)))
+    if not results:
+        return "No matching occupations found in the ASC knowledge base."
+    return "\n".join(format_occupation(occupation) for _, occupation in results)
+
+
+if __name__ == "__main__":
+    query = " ".join(sys.argv[1:]) or "python data analysis"
+    index = get_asc_index()
+    start = time.perf_counter()
+    results = index.search(query, top_k=5)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    for score, occupation in results:
+        print(f"{score:7.3f}  {occupation['title']} (ANZSCO: {occupation['anzsco_code']})")
+    print(f"{len(index.documents)} occupations searched in {elapsed_ms:.2f} ms")
@@ -0,0 +1,154 @@
+# utils/agents/conversation_context.py
+import os
+import threading
+
+from utils.agents.agent_runtime import get_agent_runtime
+from utils.openai_scheduler import BACKGROUND, estimate_tokens as estimate_request_tokens, get_openai_scheduler
+
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", 3000))
+CONTEXT_MAX_TURNS = int(os.environ.get("CONTEXT_MAX_TURNS", 6))
+SUMMARY_MODEL = os.environ.get("CONTEXT_SUMMARY_MODEL", "gpt-4o-mini")
+SUMMARY_MAX_TOKENS = 400
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def _format_turns(messages):
+    return "\n".join(f"{m['role'].capitalize()}: {m['content']}" for m in messages)
+
+
+class ConversationContext:
+    """
+    Token-budgeted view of a chat history for agent runs.
+
+    The most recent turns (at most `max_turns` user/assistant pairs, within
+    `token_budget`) are sent verbatim. The window is cut on whole turns, and
+    the latest turn is always kept, truncated when it alone exceeds the
+    budget, so a follow-up can refer to the previous answer. Messages that
+    fall out of that window
+    are folded into a running summary exactly once: each compaction only
+    sends the newly evicted messages plus the previous summary to the model,
+    in the background on the agent runtime loop. Until a compaction finishes
+    the previous summary is used, so no turn waits on summarization.
+    """
+
+    def __init__(self, token_budget=CONTEXT_TOKEN_BUDGET, max_turns=CONTEXT_MAX_TURNS):
+        self.token_budget = token_budget
+        self.max_turns = max_turns
+        self.summary = ""
+        self.summarized_count = 0
+        self._pending = None
+        self._lock = threading.Lock()
+
+    def _collect_pending(self):
+        if self._pending and self._pending[0].done():
+            future, count = self._pending
+            self._pending = None
+            try:
+                self.summary = future.result()
+                self.summarized_count = count
+            except Exception as e:
+                print(f"Conversation summary failed, keeping previous summary: {e}")
+
+    def _split(self, history):
+        """Return the index where the verbatim window starts, always at the start of a turn."""
+        # A turn is a user message and the replies after it; a leading reply forms its own turn.
+        turn_starts = [i for i, m in enumerate(history) if i == 0 or m["role"] == "user"]
+        start = len(history)
+        used = estimate_tokens(self.summary)
+        turns = 0
+        for turn_start in reversed(turn_starts):
+            if turn_start < self.summarized_count:
+                break
+            cost = sum(estimate_tokens(m["content"]) for m in history[turn_start:start])
+            if turns and (used + cost > self.token_budget or turns >= self.max_turns):
+                break
+            used += cost
+            turns += 1
+            start = turn_start
+        return start
+
+    def _fit(self, messages):
+        """Truncate messages evenly when the window (only ever the latest turn) exceeds the budget."""
+        available = max(self.token_budget - estimate_tokens(self.summary), 0)
+        if sum(estimate_tokens(m["content"]) for m in messages) <= available:
+            return messages
+        max_chars = max(available // len(messages), 50) * 4
+        return [
+            {"role": m["role"], "content": m["content"] if len(m["content"]) <= max_chars
+             else m["content"][:max_chars] + " [truncated]"}
+            for m in messages
+        ]
+
+    def build_input(self, history, user_query, summarize):
+        """
+        Build the model input for a turn.
+
+        Args:
+            history: Prior chat messages ({"role", "content"}), oldest first, excluding the current query
+            user_query: The current user message
+            summarize: Callable(previous_summary, messages) -> coroutine returning the new summary
+
+        Returns:
+            list: Response input items for Runner.run
+        """
+        history = [m for m in history if m.get("role") in ("user", "assistant") and m.get("content")]
+        with self._lock:
+            self._collect_pending()
+            if self.summarized_count > len(history):
+                self.summary, self.summarized_count = "", 0
+
+            start = self._split(history)
+            if start > self.summarized_count and self._pending is None:
+                evicted = history[self.summarized_count:start]
+                future = get_agent_runtime().submit(summarize(self.summary, evicted))
+                self._pending = (future, start)
+
+            # Messages evicted but not yet summarized are dropped for this turn only.
+            items = []
+            if self.summary:
+                items.append({
+                    "role": "system",
+                    "content": f"Summary of the earlier conversation with this user:\n{self.summary}",
+                })
+            items.extend({"role": m["role"], "content": m["content"]} for m in self._fit(history[start:]))
+            items.append({"role": "user", "content": user_query})
+            return items
+
+
+def make_summarizer(client, api_key=None, model=SUMMARY_MODEL):
+    """
+    Return a summarize(previous_summary, messages) coroutine factory using an
+    AsyncOpenAI client. Calls run at background priority in the OpenAI scheduler.
+    """
+    async def summarize(previous_summary, messages):
+        request_messages = [
+            {"role": "system", "content": (
+                "You maintain a running summary of a career guidance conversation. "
+                "Update the summary with the new messages. Keep the user's stated skills, "
+                "interests, locations, constraints and any occupations or jobs already discussed. "
+                "Be concise and factual."
+            )},
+            {"role": "user", "content": (
+                f"Current summary:\n{previous_summary or '(none)'}\n\n"
+                f"New messages:\n{_format_turns(messages)}"
+            )},
+        ]
+        response = await get_openai_scheduler().call_async(
+            lambda: client.chat.completions.create(
+                model=model,
+                messages=request_messages,
+                temperature=0,
+                max_tokens=SUMMARY_MAX_TOKENS,
+            ),
+            model=model,
+            estimated_tokens=estimate_request_tokens(str(request_messages), SUMMARY_MAX_TOKENS),
+            priority=BACKGROUND,
+            api_key=api_key,
+        )
+        return response.choices[0].message.content.strip()
+
+    return summarize
@@ -0,0 +1,184 @@
+# utils/agents/intent_router.py
+import math
+import os
+import re
+from collections import Counter
+
+INTENT_ROUTER_ENABLED = os.environ.get("INTENT_ROUTER_ENABLED", "1") == "1"
+INTENT_ROUTER_THRESHOLD = float(os.environ.get("INTENT_ROUTER_THRESHOLD", 0.85))
+# A keyword rule hit multiplies the odds of its intent by this much before the threshold is applied.
+INTENT_RULE_BOOST = float(os.environ.get("INTENT_RULE_BOOST", 4.0))
+
+TRIAGE = "triage"
+ASC_RETRIEVAL = "asc_retrieval"
+JOB_SEARCH = "job_search"
+
+RULES = {
+    JOB_SEARCH: re.compile(
+        r"\b(job (listings?|openings?|ads?|posts?|postings?|vacanc\w*)|vacanc\w*|(who is|companies) hiring|"
+        r"open (roles|positions)|apply (for|to) (an? |the )?(jobs?|roles?|positions?|vacanc\w*)|job hunt\w*|"
+        r"job interviews?|interview (prep\w*|questions?|tips)|seek\.com|on seek|linkedin jobs|indeed\.com|"
+        r"jobs? (in|near|around) )",
+        re.IGNORECASE,
+    ),
+    ASC_RETRIEVAL: re.compile(
+        r"\b(anzsco|asc|australian skills classification|careers? (that )?(match|suit|fit)|"
+        r"career (paths?|recommendations?|options?)|occupations?|skills? should i (develop|learn)|"
+        r"which careers?|what careers?|core competenc\w*)",
+        re.IGNORECASE,
+    ),
+}
+
+TRAINING_EXAMPLES = {
+    ASC_RETRIEVAL: [
+        "what careers match my skills",
+        "which occupations suit my competencies",
+        "recommend a career path based on my skills",
+        "what jobs could i do with python and sql skills",
+        "what skills should i develop for data science",
+        "what are the top tech careers",
+        "what does a software engineer do",
+        "what qualifications does a nurse need",
+        "tell me about careers in cyber security",
+        "which roles fit my problem solving and numeracy",
+        "what career suits someone who likes writing",
+        "how can i move into project management",
+        "would my skills transfer to nursing",
+        "what tasks does a data analyst perform",
+        "what tools do web developers use",
+        "is accounting a good fit for my skills",
+        "suggest occupations for someone with teamwork and communication",
+    ],
+    JOB_SEARCH: [
+        "find me jobs in melbourne",
+        "show current job listings for data analysts",
+        "which companies are hiring software engineers",
+        "are there any openings for nurses in sydney",
+        "find graduate roles near brisbane",
+        "what is the job market like for developers right now",
+        "help me prepare for an interview at atlassian",
+        "search for remote python developer jobs",
+        "any junior web developer positions available",
+        "how do i apply for roles at canva",
+        "latest vacancies for accountants in perth",
+        "give me tips for my job application",
+        "what salary can i expect for a data engineer job in adelaide",
+        "look up open positions on seek",
+    ],
+    TRIAGE: [
+        "hi",
+        "hello there",
+        "thanks",
+        "thank you that helps",
+        "what can you do",
+        "who are you",
+        "can you explain that again",
+        "tell me more",
+        "yes please",
+        "no thanks",
+        "what did you mean by that",
+        "how does this app work",
+        "i am not sure what i want",
+        "how do i apply that advice",
+        "can you help me",
+    ],
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9+#]+")
+
+
+def _features(text):
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    return tokens + [f"{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+
+
+class NaiveBayesIntentClassifier:
+    """Multinomial naive Bayes over unigrams and bigrams with Laplace smoothing."""
+
+    def __init__(self, examples, alpha=1.0):
+        self.alpha = alpha
+        self.labels = list(examples)
+        total = sum(len(texts) for texts in examples.values())
+        self.log_priors = {label: math.log(len(texts) / total) for label, texts in examples.items()}
+        self.counts = {label: Counter() for label in self.labels}
+        for label, texts in examples.items():
+            for text in texts:
+                self.counts[label].update(_features(text))
+        self.vocabulary = set().union(*self.counts.values())
+        self.totals = {label: sum(counts.values()) for label, counts in self.counts.items()}
+
+    def predict_proba(self, text):
+        features = [f for f in _features(text) if f in self.vocabulary]
+        log_scores = {}
+        for label in self.labels:
+            denominator = self.totals[label] + self.alpha * len(self.vocabulary)
+            log_scores[label] = self.log_priors[label] + sum(
+                math.log((self.counts[label][f] + self.alpha) / denominator) for f in features
+            )
+        top = max(log_scores.values())
+        exp_scores = {label: math.exp(score - top) for label, score in log_scores.items()}
+        norm = sum(exp_scores.values())
+        return {label: score / norm for label, score in exp_scores.items()}, len(features)
+
+
+_classifier = NaiveBayesIntentClassifier(TRAINING_EXAMPLES)
+
+
+def route_query(user_query, threshold=INTENT_ROUTER_THRESHOLD):
+    """
+    Decide which agent should handle a query.
+
+    Returns:
+        tuple: (route, confidence, reason) where route is "asc_retrieval",
+            "job_search", or "triage" when the triage agent should decide
+    """
+    if not INTENT_ROUTER_ENABLED:
+        return TRIAGE, 0.0, "router disabled"
+
+    rule_hits = [label for label, pattern in RULES.items() if pattern.search(user_query)]
+    probabilities, known_features = _classifier.predict_proba(user_query)
+    if known_features < 2 and not rule_hits:
+        return TRIAGE, 0.0, "too few known terms"
+
+    reason = "classifier"
+    if len(rule_hits) == 1:
+        # The rule is evidence for its intent, not a verdict: the classifier still has to agree.
+        probabilities[rule_hits[0]] *= INTENT_RULE_BOOST
+        norm = sum(probabilities.values())
+        probabilities = {label: p / norm for label, p in probabilities.items()}
+        reason = "keyword rule + classifier"
+
+    label = max(probabilities, key=probabilities.get)
+    confidence = probabilities[label]
+    if rule_hits and label not in rule_hits:
+        return TRIAGE, confidence, "rules and classifier disagree"
+    if label == TRIAGE or confidence < threshold:
+        return TRIAGE, confidence, f"{reason} ({label})"
+    return label, confidence, reason
+
+
+# Expected routes for queries near the rule boundaries, including ones that merely
+# mention "apply", "seek" or "interview"; run this module to check them.
+ROUTING_CASES = [
+    ("find me data analyst jobs in melbourne", JOB_SEARCH),
+    ("show me job listings for nurses in sydney", JOB_SEARCH),
+    ("which companies hiring graduate developers", JOB_SEARCH),
+    ("how do i apply for a job at canva", JOB_SEARCH),
+    ("what careers match my python and sql skills", ASC_RETRIEVAL),
+    ("which occupations suit my core competencies", ASC_RETRIEVAL),
+    ("how do my skills apply to teaching", ASC_RETRIEVAL),
+    ("how do i apply that to my situation", TRIAGE),
+    ("i seek a career with more meaning", ASC_RETRIEVAL),
+    ("what is an interviewer looking for in my answers", TRIAGE),
+    ("hi", TRIAGE),
+]
+
+
+if __name__ == "__main__":
+    failures = 0
+    for query, expected in ROUTING_CASES:
+        route, confidence, reason = route_query(query)
+        ok = route == expected
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {route:<14} {confidence:.2f} {reason:<28} {query}")
+    raise SystemExit(1 if failures else 0)
@@ -0,0 +1,181 @@
+# utils/agents/job_cache.py
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+JOB_CACHE_PATH = os.environ.get("JOB_CACHE_PATH", "data/cache/jobs.sqlite")
+# Results younger than this are served without a web search.
+JOB_CACHE_TTL_SECONDS = int(os.environ.get("JOB_CACHE_TTL_SECONDS", 6 * 60 * 60))
+# Postings not seen in a search for this long are treated as expired and dropped.
+JOB_POSTING_MAX_AGE_SECONDS = int(os.environ.get("JOB_POSTING_MAX_AGE_SECONDS", 7 * 24 * 60 * 60))
+# A refresh claimed by another session or worker is not repeated within this window.
+JOB_REFRESH_LEASE_SECONDS = 5 * 60
+DEFAULT_LOCATION = "australia"
+
+
+class JobListing(BaseModel):
+    title: str
+    company: str
+    location: str
+    salary: Optional[str]
+    link: Optional[str]
+    summary: Optional[str]
+
+
+class JobListings(BaseModel):
+    jobs: List[JobListing]
+
+
+def canonical_skills(skills):
+    return sorted({re.sub(r"\s+", " ", s.strip().lower()) for s in skills if s and s.strip()})
+
+
+def canonical_location(location):
+    location = re.sub(r"\s+", " ", (location or "").strip().lower())
+    return location or DEFAULT_LOCATION
+
+
+def canonical_role(role):
+    """Lowercase and collapse whitespace; an empty role means "jobs matching the user's skills"."""
+    return re.sub(r"\s+", " ", (role or "").strip().lower()).strip(" .,!?")
+
+
+def job_cache_key(skills, location, role=""):
+    """
+    Key job results by the requested role and location. Searches without a
+    role are for the user's profile, so they are keyed by the canonical skill set.
+    """
+    role = canonical_role(role)
+    payload = json.dumps([[] if role else canonical_skills(skills), canonical_location(location), role])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def format_listings(listings):
+    lines = []
+    for job in listings:
+        line = f"- {job['title']} at {job['company']} ({job['location']})"
+        if job.get("salary"):
+            line += f", {job['salary']}"
+        if job.get("summary"):
+            line += f": {job['summary']}"
+        if job.get("link"):
+            line += f" [Apply]({job['link']})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+class JobCache:
+    """
+    SQLite store of normalized job listings keyed by role (or skill set) and location.
+
+    The database is shared by every session and worker on the host.
+    """
+
+    def __init__(self, path=JOB_CACHE_PATH, ttl_seconds=JOB_CACHE_TTL_SECONDS,
+                 max_posting_age_seconds=JOB_POSTING_MAX_AGE_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_posting_age_seconds = max_posting_age_seconds
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_queries ("
+                "cache_key TEXT PRIMARY KEY, skills TEXT, location TEXT, fetched_at REAL, refreshing_since REAL, "
+                "role TEXT)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(job_queries)")}
+            if "role" not in columns:
+                conn.execute("ALTER TABLE job_queries ADD COLUMN role TEXT")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_listings ("
+                "cache_key TEXT, listing_id TEXT, title TEXT, company TEXT, location TEXT, salary TEXT, "
+                "link TEXT, summary TEXT, seen_at REAL, PRIMARY KEY (cache_key, listing_id))"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, cache_key):
+        """
+        Return cached listings for the key.
+
+        Returns:
+            tuple: (listings, is_fresh), or (None, False) when nothing has been cached
+        """
+        now = time.time()
+        with self._connect() as conn:
+            query = conn.execute(
+                "SELECT fetched_at FROM job_queries WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            if not query:
+                return None, False
+            rows = conn.execute(
+                "SELECT title, company, location, salary, link, summary, seen_at FROM job_listings "
+                "WHERE cache_key = ? AND seen_at >= ? ORDER BY seen_at DESC",
+                (cache_key, now - self.max_posting_age_seconds),
+            ).fetchall()
+
+        listings = [
+            dict(zip(("title", "company", "location", "salary", "link", "summary", "seen_at"), row))
+            for row in rows
+        ]
+        return listings, now - query[0] < self.ttl_seconds
+
+    def put(self, cache_key, skills, location, listings, role=""):
+        """
+        Store freshly searched listings in place of the key's previous set, so
+        postings the new search no longer returns stop being served, and drop
+        postings past their maximum age.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_queries (cache_key, skills, location, fetched_at, refreshing_since, role) "
+                "VALUES (?, ?, ?, ?, NULL, ?)",
+                (cache_key, json.dumps(canonical_skills(skills)), canonical_location(location), now,
+                 canonical_role(role)),
+            )
+            conn.execute("DELETE FROM job_listings WHERE cache_key = ?", (cache_key,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO job_listings "
+                "(cache_key, listing_id, title, company, location, salary, link, summary, seen_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (cache_key, job.link or f"{job.title}|{job.company}|{job.location}".lower(),
+                     job.title, job.company, job.location, job.salary, job.link, job.summary, now)
+                    for job in listings
+                ],
+            )
+            conn.execute("DELETE FROM job_listings WHERE seen_at < ?", (now - self.max_posting_age_seconds,))
+
+    def claim_refresh(self, cache_key):
+        """Mark a background refresh as started. Returns False if one is already running."""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE job_queries SET refreshing_since = ? WHERE cache_key = ? "
+                "AND (refreshing_since IS NULL OR refreshing_since < ?)",
+                (now, cache_key, now - JOB_REFRESH_LEASE_SECONDS),
+            )
+            return cursor.rowcount > 0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_job_cache():
+    """Return the process-wide job cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = JobCache()
+    return _cache
@@ -0,0 +1,236 @@
+# utils/agents/kb_sync.py
+import concurrent.futures
+import contextlib
+import hashlib
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: only sessions within one process are serialized
+    fcntl = None
+
+KB_TEXT_PATH = "data/files"
+KB_SYNC_LOCK_PATH = os.environ.get("ASC_SYNC_LOCK_PATH", "data/cache/kb_sync.lock")
+UPLOAD_WORKERS = int(os.environ.get("ASC_SYNC_UPLOAD_WORKERS", 16))
+# The vector store file batch endpoint accepts at most 500 file IDs per batch.
+ATTACH_BATCH_SIZE = 500
+
+
+def hash_file(path):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(65536), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_local_files(kb_dir=KB_TEXT_PATH):
+    """
+    Hash every occupation text file in the knowledge base directory.
+
+    Returns:
+        dict: {filename: sha256}
+    """
+    if not os.path.isdir(kb_dir):
+        return {}
+    return {
+        filename: hash_file(os.path.join(kb_dir, filename))
+        for filename in sorted(os.listdir(kb_dir))
+        if os.path.isfile(os.path.join(kb_dir, filename))
+    }
+
+
+_sync_thread_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def kb_sync_lock(path=KB_SYNC_LOCK_PATH):
+    """
+    Hold the host-wide knowledge base sync lock, so sessions and processes
+    starting cold at the same time don't each upload the same files.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with _sync_thread_lock, open(path, "a") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class KnowledgeBaseSync:
+    """
+    Incremental sync of the local ASC text files into an OpenAI vector store.
+
+    Local files are identified by content hash and diffed against the file
+    records kept in the vector store manifest ({filename: {"sha256", "file_id", "tagged"}}).
+    Only new or changed files are uploaded, concurrently, and attached to the
+    store in large batches; each attached file also carries its filename and
+    hash as vector store file attributes. Files that are stale, replaced, no
+    longer have a local source, or are attached to the store but unknown to
+    the manifest are removed. Failed uploads, attaches and tags are reported
+    so the caller can retry them on the next sync.
+
+    Callers hold kb_sync_lock() around run().
+    """
+
+    def __init__(self, client, vector_store_id, kb_dir=KB_TEXT_PATH, upload_workers=UPLOAD_WORKERS):
+        self.client = client
+        self.vector_store_id = vector_store_id
+        self.kb_dir = kb_dir
+        self.upload_workers = upload_workers
+
+    def _list_attached_files(self):
+        """Return {file_id: attributes} for every file attached to the store."""
+        return {
+            f.id: f.attributes or {}
+            for f in self.client.vector_stores.files.list(vector_store_id=self.vector_store_id, limit=100)
+        }
+
+    def _adopt_remote_files(self, attached, local_hashes):
+        """
+        Build file records for a store with no manifest records.
+
+        Attached files are matched to local files by the filename and content
+        hash in their attributes, so an existing upload is kept instead of being
+        repeated. Files without those attributes are replaced.
+        """
+        records = {}
+        for file_id, attributes in attached.items():
+            filename = attributes.get("filename")
+            if filename in local_hashes and filename not in records and attributes.get("sha256") == local_hashes[filename]:
+                records[filename] = {"sha256": local_hashes[filename], "file_id": file_id}
+        print(f"Adopted {len(records)} existing vector store file(s) into the manifest.")
+        return records
+
+    def _tag(self, file_id, filename, sha256):
+        self.client.vector_stores.files.update(
+            file_id, vector_store_id=self.vector_store_id, attributes={"filename": filename, "sha256": sha256}
+        )
+
+    def _upload(self, filename):
+        with open(os.path.join(self.kb_dir, filename), "rb") as f:
+            return self.client.files.create(file=f, purpose="assistants").id
+
+    def _attach(self, file_ids):
+        """Attach uploaded files in batches and return the IDs that failed to index."""
+        failed = set()
+        for start in range(0, len(file_ids), ATTACH_BATCH_SIZE):
+            chunk = file_ids[start:start + ATTACH_BATCH_SIZE]
+            batch = self.client.vector_stores.file_batches.create_and_poll(
+                vector_store_id=self.vector_store_id,
+                file_ids=chunk,
+            )
+            print(f"Attached batch {batch.id}: {batch.file_counts}")
+            if batch.file_counts.failed:
+                failed.update(
+                    f.id for f in self.client.vector_stores.file_batches.list_files(
+                        vector_store_id=self.vector_store_id,
+                        batch_id=batch.id,
+                        filter="failed",
+                    )
+                )
+        return failed
+
+    def _delete(self, file_id):
+        try:
+            self.client.vector_stores.files.delete(vector_store_id=self.vector_store_id, file_id=file_id)
+        except Exception as e:
+            print(f"Could not detach file {file_id} from vector store: {e}")
+        try:
+            self.client.files.delete(file_id)
+        except Exception as e:
+            print(f"Could not delete file {file_id}: {e}")
+
+    def run(self, recorded_files=None, with_status=False):
+        """
+        Bring the vector store in line with the local knowledge base.
+
+        Args:
+            recorded_files: File records from the manifest, or None for a store with no records
+            with_status: Return (records, complete) so callers can tell whether any file failed
+
+        Returns:
+            dict: Updated file records to store in the manifest
+        """
+        errors = 0
+        local_hashes = hash_local_files(self.kb_dir)
+        attached = self._list_attached_files()
+        attached_ids = set(attached)
+
+        if not recorded_files and attached:
+            recorded_files = self._adopt_remote_files(attached, local_hashes)
+        recorded_files = dict(recorded_files or {})
+
+        records = {}
+        to_upload = []
+        to_delete = set(attached_ids)
+
+        to_tag = {}
+        for filename, sha256 in local_hashes.items():
+            record = recorded_files.get(filename)
+            if record and record["sha256"] == sha256 and record["file_id"] in attached_ids:
+                records[filename] = record
+                to_delete.discard(record["file_id"])
+                if record.get("tagged") is False:
+                    to_tag[filename] = record["file_id"]
+            else:
+                to_upload.append(filename)
+
+        kept_ids = {record["file_id"] for record in records.values()}
+        to_delete.update(
+            record["file_id"] for record in recorded_files.values() if record["file_id"] not in kept_ids
+        )
+
+        print(f"Knowledge base sync: {len(records)} unchanged, {len(to_upload)} to upload, {len(to_delete)} to delete.")
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.upload_workers) as executor:
+            uploaded = {}
+            futures = {executor.submit(self._upload, filename): filename for filename in to_upload}
+            for future in concurrent.futures.as_completed(futures):
+                filename = futures[future]
+                try:
+                    uploaded[filename] = future.result()
+                except Exception as e:
+                    errors += 1
+                    print(f"Upload failed for {filename}: {e}")
+
+            failed = self._attach(list(uploaded.values())) if uploaded else set()
+            errors += len(failed)
+            for filename, file_id in uploaded.items():
+                if file_id in failed:
+                    to_delete.add(file_id)
+                else:
+                    records[filename] = {"sha256": local_hashes[filename], "file_id": file_id}
+                    to_tag[filename] = file_id
+
+            tags = {
+                executor.submit(self._tag, file_id, filename, local_hashes[filename]): filename
+                for filename, file_id in to_tag.items()
+            }
+            for future in concurrent.futures.as_completed(tags):
+                filename = tags[future]
+                try:
+                    future.result()
+                    records[filename] = {**records[filename], "tagged": True}
+                except Exception as e:
+                    # Still indexed, so the file is kept; the tag is retried on the next sync.
+                    errors += 1
+                    records[filename] = {**records[filename], "tagged": False}
+                    print(f"Could not tag {filename} with its hash: {e}")
+
+            list(executor.map(self._delete, to_delete))
+
+        print(f"Knowledge base sync complete: {len(records)} file(s) indexed, {errors} failure(s).")
+        return (records, not errors) if with_status else records
+
+
+if __name__ == "__main__":
+    from utils.agents.agent_manager import AgentManager
+
+    manager = AgentManager(api_key=os.environ["OPENAI_API_KEY"])
+    manager.set_asc_vector_store(revalidate=True)
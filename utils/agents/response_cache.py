@@ -0,0 +1,155 @@
+# utils/agents/response_cache.py
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from utils.supabase_data_utils import register_profile_listener
+
+RESPONSE_CACHE_TTL_SECONDS = int(os.environ.get("RESPONSE_CACHE_TTL_SECONDS", 6 * 60 * 60))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 1024))
+# Set to an empty string to keep the cache in memory only.
+RESPONSE_CACHE_PATH = os.environ.get("RESPONSE_CACHE_PATH", "data/cache/responses.sqlite")
+
+SUGGESTED_PROMPTS = [
+    "What careers match my skills?",
+    "What skills should I develop?",
+    "What are the top tech careers?",
+]
+
+
+def normalize_query(query):
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r"\s+", " ", query.strip().lower()).rstrip("?!. ")
+
+
+_suggested = {normalize_query(prompt) for prompt in SUGGESTED_PROMPTS}
+
+
+def is_suggested_prompt(query):
+    return normalize_query(query) in _suggested
+
+
+def fingerprint(value):
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def response_cache_key(query, user_id, profile_text, config_fingerprint):
+    """
+    Key an answer by the normalized query, the user, their profile and the
+    agent configuration. Answers are never shared between users: an empty
+    profile formats the same for everyone.
+    """
+    return fingerprint(json.dumps(
+        [normalize_query(query), str(user_id), fingerprint(profile_text), config_fingerprint]
+    ))
+
+
+class ResponseCache:
+    """
+    Two-tier answer cache for agent responses.
+
+    The memory tier is an LRU bounded by `max_entries`; the optional SQLite tier
+    is shared by every worker on the host. Entries expire after `ttl_seconds`
+    and all entries a user created are dropped when their profile is written.
+    """
+
+    def __init__(self, ttl_seconds=RESPONSE_CACHE_TTL_SECONDS, max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+                 path=RESPONSE_CACHE_PATH):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, user_id TEXT, response TEXT, created_at REAL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS responses_user_id ON responses (user_id)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key):
+        """Return the cached response for the key, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                if now - entry[1] < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    return entry[2]
+                del self._entries[key]
+
+        if not self.path:
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT user_id, response, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Response cache read failed: {e}")
+            return None
+        if not row or now - row[2] >= self.ttl_seconds:
+            return None
+
+        self._remember(key, row[0], row[1], row[2])
+        return row[1]
+
+    def _remember(self, key, user_id, response, created_at):
+        with self._lock:
+            self._entries[key] = (user_id, created_at, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put(self, key, user_id, response):
+        created_at = time.time()
+        self._remember(key, user_id, response, created_at)
+        if not self.path:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, user_id, response, created_at) VALUES (?, ?, ?, ?)",
+                    (key, user_id, response, created_at),
+                )
+                conn.execute("DELETE FROM responses WHERE created_at < ?", (created_at - self.ttl_seconds,))
+        except sqlite3.Error as e:
+            print(f"Response cache write failed: {e}")
+
+    def invalidate_user(self, user_id):
+        """Drop every cached response created for the user."""
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if entry[0] == user_id]:
+                del self._entries[key]
+        if not self.path:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM responses WHERE user_id = ?", (user_id,))
+        except sqlite3.Error as e:
+            print(f"Response cache invalidation failed: {e}")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process-wide response cache, subscribed to profile writes."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+                register_profile_listener(_cache.invalidate_user)
+    return _cache
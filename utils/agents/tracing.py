@@ -0,0 +1,268 @@
+# utils/agents/tracing.py
+import contextlib
+import glob
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from agents import add_trace_processor
+from agents.tracing import TracingProcessor, get_current_span, get_current_trace
+
+SPAN_LOG_PATH = os.environ.get("SPAN_LOG_PATH", "logs/agent_spans.jsonl")
+SPAN_LOG_MAX_BYTES = int(os.environ.get("SPAN_LOG_MAX_BYTES", 10 * 1024 * 1024))
+SPAN_LOG_BACKUPS = int(os.environ.get("SPAN_LOG_BACKUPS", 5))
+
+# USD per million (input, output) tokens, matched by model name prefix (longest first).
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-4": (30.00, 60.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+
+def estimate_cost(model, input_tokens, output_tokens):
+    """Return the estimated USD cost of a model call, or None for unknown models."""
+    for prefix in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model and model.startswith(prefix):
+            input_price, output_price = MODEL_PRICES[prefix]
+            return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+    return None
+
+
+_span_logger = None
+_span_logger_lock = threading.Lock()
+
+
+def _get_span_logger():
+    global _span_logger
+    if _span_logger is None:
+        with _span_logger_lock:
+            if _span_logger is None:
+                os.makedirs(os.path.dirname(SPAN_LOG_PATH) or ".", exist_ok=True)
+                handler = logging.handlers.RotatingFileHandler(
+                    SPAN_LOG_PATH, maxBytes=SPAN_LOG_MAX_BYTES, backupCount=SPAN_LOG_BACKUPS
+                )
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                logger = logging.getLogger("chataussiegpt.spans")
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                logger.addHandler(handler)
+                _span_logger = logger
+    return _span_logger
+
+
+def write_span_record(record):
+    """Append one span record to the rotating JSONL sink."""
+    try:
+        _get_span_logger().info(json.dumps(record, default=str))
+    except Exception as e:
+        print(f"Could not write span record: {e}")
+
+
+def _duration_ms(started_at, ended_at):
+    if not started_at or not ended_at:
+        return None
+    start = datetime.fromisoformat(started_at)
+    end = datetime.fromisoformat(ended_at)
+    return (end - start).total_seconds() * 1000
+
+
+def _describe_span_data(span_data):
+    """Map SDK span data to (kind, name, extra fields)."""
+    kind = span_data.type
+    extra = {}
+
+    if kind == "agent":
+        return kind, span_data.name, extra
+    if kind == "function":
+        return "tool", span_data.name, extra
+    if kind == "handoff":
+        return kind, f"{span_data.from_agent} -> {span_data.to_agent}", extra
+    if kind == "custom":
+        return kind, span_data.name, dict(span_data.data or {})
+
+    if kind == "response" and span_data.response is not None:
+        response = span_data.response
+        usage = response.usage
+        extra["model"] = response.model
+        if usage:
+            extra["input_tokens"] = usage.input_tokens
+            extra["output_tokens"] = usage.output_tokens
+        hosted_tools = [item.type for item in response.output if item.type in ("file_search_call", "web_search_call")]
+        if hosted_tools:
+            extra["hosted_tools"] = hosted_tools
+        return "model", response.model, extra
+
+    if kind == "generation":
+        usage = span_data.usage or {}
+        extra["model"] = span_data.model
+        extra["input_tokens"] = usage.get("input_tokens", 0)
+        extra["output_tokens"] = usage.get("output_tokens", 0)
+        return "model", span_data.model, extra
+
+    return kind, getattr(span_data, "name", kind), extra
+
+
+class MetricsTracingProcessor(TracingProcessor):
+    """
+    Agents SDK trace processor that writes per-span latency, token usage and
+    estimated cost for every agent, handoff, tool call and model call to the
+    rotating JSONL span log.
+    """
+
+    def __init__(self):
+        self._trace_starts = {}
+
+    def on_trace_start(self, trace):
+        self._trace_starts[trace.trace_id] = time.perf_counter()
+
+    def on_trace_end(self, trace):
+        started = self._trace_starts.pop(trace.trace_id, None)
+        write_span_record({
+            "trace_id": trace.trace_id,
+            "kind": "trace",
+            "name": trace.name,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": (time.perf_counter() - started) * 1000 if started else None,
+        })
+
+    def on_span_start(self, span):
+        pass
+
+    def on_span_end(self, span):
+        try:
+            kind, name, extra = _describe_span_data(span.span_data)
+            record = {
+                "trace_id": span.trace_id,
+                "span_id": span.span_id,
+                "parent_id": span.parent_id,
+                "kind": kind,
+                "name": name,
+                "timestamp": span.started_at,
+                "duration_ms": _duration_ms(span.started_at, span.ended_at),
+                "error": span.error,
+                **extra,
+            }
+            if "input_tokens" in record:
+                record["cost_usd"] = estimate_cost(
+                    record.get("model"), record["input_tokens"] or 0, record["output_tokens"] or 0
+                )
+            write_span_record(record)
+        except Exception as e:
+            print(f"Error recording span: {e}")
+
+    def shutdown(self):
+        pass
+
+    def force_flush(self):
+        for handler in _get_span_logger().handlers:
+            handler.flush()
+
+
+@contextlib.contextmanager
+def timed_operation(kind, name, **fields):
+    """
+    Record the latency of a non-SDK operation (for example a Supabase query)
+    in the span log, attached to the current agent trace and span when there is one.
+    """
+    trace = get_current_trace()
+    parent = get_current_span()
+    started_at = datetime.now(timezone.utc).isoformat()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        write_span_record({
+            "trace_id": trace.trace_id if trace else None,
+            "parent_id": parent.span_id if parent else None,
+            "kind": kind,
+            "name": name,
+            "timestamp": started_at,
+            "duration_ms": (time.perf_counter() - start) * 1000,
+            "error": error,
+            **fields,
+        })
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def summarize_spans(path=SPAN_LOG_PATH, since=None):
+    """
+    Aggregate the span log (including rotated files) by kind and name.
+
+    Args:
+        since: Only include spans whose timestamp is at or after this UTC datetime
+
+    Returns:
+        list: One dict per (kind, name) with count, errors, p50/p95 latency, tokens and cost
+    """
+    groups = {}
+    for file_path in sorted(glob.glob(f"{path}*")):
+        try:
+            with open(file_path, "r") as f:
+                lines = f.readlines()
+        except OSError:
+            continue
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if since and record.get("timestamp") and datetime.fromisoformat(record["timestamp"]) < since:
+                continue
+            group = groups.setdefault((record.get("kind"), record.get("name")), {
+                "durations": [], "errors": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0,
+            })
+            if record.get("duration_ms") is not None:
+                group["durations"].append(record["duration_ms"])
+            if record.get("error"):
+                group["errors"] += 1
+            group["input_tokens"] += record.get("input_tokens") or 0
+            group["output_tokens"] += record.get("output_tokens") or 0
+            group["cost_usd"] += record.get("cost_usd") or 0.0
+
+    summary = []
+    for (kind, name), group in groups.items():
+        durations = sorted(group["durations"])
+        summary.append({
+            "kind": kind,
+            "name": name,
+            "count": len(durations),
+            "errors": group["errors"],
+            "p50_ms": round(_percentile(durations, 0.50), 1) if durations else None,
+            "p95_ms": round(_percentile(durations, 0.95), 1) if durations else None,
+            "input_tokens": group["input_tokens"],
+            "output_tokens": group["output_tokens"],
+            "cost_usd": round(group["cost_usd"], 4),
+        })
+    return sorted(summary, key=lambda row: (row["kind"] or "", -(row["p95_ms"] or 0)))
+
+
+_installed = False
+_install_lock = threading.Lock()
+
+
+def install_tracing():
+    """Register the metrics processor with the Agents SDK once per process."""
+    global _installed
+    with _install_lock:
+        if not _installed:
+            add_trace_processor(MetricsTracingProcessor())
+            _installed = True
@@ -0,0 +1,121 @@
+# utils/agents/vector_store_manifest.py
+import hashlib
+import json
+import os
+import threading
+import time
+
+MANIFEST_PATH = os.environ.get("ASC_MANIFEST_PATH", "data/cache/vector_store_manifest.json")
+MANIFEST_TTL_SECONDS = int(os.environ.get("ASC_MANIFEST_TTL_SECONDS", 24 * 60 * 60))
+
+
+def manifest_key(api_key, organization=None):
+    """
+    Build the manifest key for an OpenAI account.
+
+    Vector stores belong to the organization, so the org is preferred when known.
+    Only a hash is stored, never the API key itself.
+    """
+    owner = f"org:{organization}" if organization else f"key:{api_key}"
+    return hashlib.sha256(owner.encode()).hexdigest()
+
+
+class VectorStoreManifest:
+    """
+    Persistent record of the resolved ASC vector store and its file set.
+
+    Entries are kept in a JSON file shared by every session and process on the
+    host, plus an in-memory copy that is reloaded whenever the file changes.
+    An entry is fresh for `ttl_seconds` after it was last validated against
+    the OpenAI API.
+    """
+
+    def __init__(self, path=MANIFEST_PATH, ttl_seconds=MANIFEST_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._entries = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def _reload_if_changed(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            self._entries, self._mtime = {}, None
+            return
+
+        if mtime == self._mtime:
+            return
+
+        try:
+            with open(self.path, "r") as f:
+                self._entries = json.load(f)
+            self._mtime = mtime
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable vector store manifest {self.path}: {e}")
+            self._entries, self._mtime = {}, None
+
+    def _write(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._entries, f, indent=2)
+        os.replace(tmp_path, self.path)
+        self._mtime = os.path.getmtime(self.path)
+
+    def is_fresh(self, entry):
+        return time.time() - entry.get("validated_at", 0) < self.ttl_seconds
+
+    def get(self, key, allow_stale=False):
+        """
+        Return the manifest entry for the key.
+
+        Returns:
+            dict or None: The entry, or None when missing or (unless allow_stale) expired
+        """
+        with self._lock:
+            self._reload_if_changed()
+            entry = self._entries.get(key)
+        if entry is None or (not allow_stale and not self.is_fresh(entry)):
+            return None
+        return dict(entry)
+
+    def put(self, key, vector_store_id, name, files, complete=True):
+        """
+        Record a vector store and its files as validated now.
+
+        Args:
+            files: {filename: {"sha256": str, "file_id": str}} for every indexed file
+            complete: False when some files failed to sync. The entry is then stored
+                already stale, so the next lookup syncs again and retries them.
+        """
+        with self._lock:
+            self._reload_if_changed()
+            self._entries[key] = {
+                "vector_store_id": vector_store_id,
+                "name": name,
+                "files": files,
+                "validated_at": time.time() if complete else 0,
+            }
+            self._write()
+
+    def invalidate(self, key):
+        """Drop the entry so the next lookup revalidates against the API."""
+        with self._lock:
+            self._reload_if_changed()
+            if self._entries.pop(key, None) is not None:
+                self._write()
+
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+
+def get_vector_store_manifest():
+    """Return the process-wide manifest instance."""
+    global _manifest
+    if _manifest is None:
+        with _manifest_lock:
+            if _manifest is None:
+                _manifest = VectorStoreManifest()
+    return _manifest
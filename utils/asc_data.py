@@ -1,3 +1,13 @@
+import json
+import os
+import threading
+
+ASC_KB_JSON_PATH = "data/asc_knowledge_base.json"
+
+_kb_cache = {}
+_kb_lock = threading.Lock()
+
+
 def get_asc_core_competencies():
     """
     Return the core competencies from the ASC dataset.
@@ -20,4 +30,36 @@ def get_asc_core_competencies():
         "Writing": "The ability to communicate effectively in written form to a range of audiences."
     }
 
-    return core_competencies
\ No newline at end of file
+    return core_competencies
+
+
+def load_asc_knowledge_base(json_path=ASC_KB_JSON_PATH):
+    """
+    Load the ASC occupation knowledge base.
+
+    The parsed file is cached per process and reloaded only when it changes on disk.
+
+    Returns:
+        list: Occupation entries, each with a "metadata" dict
+    """
+    try:
+        mtime = os.path.getmtime(json_path)
+    except OSError:
+        print(f"ASC knowledge base not found: {json_path}")
+        return []
+
+    with _kb_lock:
+        cached = _kb_cache.get(json_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            with open(json_path, "r") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Error loading JSON file: {e}")
+            return []
+
+        entries = data if isinstance(data, list) else [data]
+        _kb_cache[json_path] = (mtime, entries)
+        return entries
@@ -0,0 +1,168 @@
+# utils/career_matcher.py
+import threading
+
+import numpy as np
+from scipy import sparse
+
+from utils.asc_data import get_asc_core_competencies, load_asc_knowledge_base
+
+# Share of the final score that comes from technology tools when competency ratings are also known.
+TOOL_WEIGHT = 0.7
+# Only report occupations that share at least one tool or clear this competency fit.
+MIN_MATCH_SCORE = 1
+
+
+class CareerMatcher:
+    """
+    Deterministic skill-to-occupation scoring over the ASC knowledge base.
+
+    Precomputes a sparse occupation x technology-tool matrix (IDF weighted,
+    rows L2 normalised) and a dense occupation x core-competency score matrix,
+    so a user's profile is scored against every occupation with one sparse
+    mat-vec product and one vectorised gap computation.
+    """
+
+    def __init__(self, entries):
+        self.occupations = []
+        self.tool_index = {}
+        self.tool_names = []
+        self.competency_names = [name.lower() for name in get_asc_core_competencies()]
+        competency_index = {name: i for i, name in enumerate(self.competency_names)}
+
+        rows, cols = [], []
+        competency_scores = np.zeros((len(entries), len(self.competency_names)))
+
+        for row, entry in enumerate(entries):
+            metadata = entry.get("metadata", {})
+            self.occupations.append({
+                "title": metadata.get("title", "Unknown Title"),
+                "anzsco_code": metadata.get("anzsco_code", "Unknown"),
+            })
+
+            for tool in {t.strip().lower() for t in metadata.get("technology_tools", []) if t.strip()}:
+                col = self.tool_index.setdefault(tool, len(self.tool_index))
+                if col == len(self.tool_names):
+                    self.tool_names.append(tool)
+                rows.append(row)
+                cols.append(col)
+
+            for comp in metadata.get("core_competencies", []):
+                col = competency_index.get(comp.get("name", "").lower())
+                try:
+                    score = float(comp.get("score", 0) or 0)
+                except (TypeError, ValueError):
+                    continue
+                if col is not None:
+                    competency_scores[row, col] = score
+
+        shape = (len(entries), len(self.tool_index))
+        tools = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=shape)
+
+        document_frequency = np.asarray(tools.sum(axis=0)).ravel()
+        self.tool_idf = np.log((1 + len(entries)) / (1 + document_frequency)) + 1
+        weighted = tools.multiply(self.tool_idf).tocsr()
+        row_norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        row_norms[row_norms == 0] = 1
+        self.tool_matrix = sparse.diags(1 / row_norms) @ weighted
+        self.tool_presence = tools
+
+        max_score = competency_scores.max() if competency_scores.size else 0
+        self.competency_matrix = competency_scores / max_score if max_score > 0 else competency_scores
+        self.has_competency_data = self.competency_matrix.any(axis=1)
+
+    def _user_tool_vector(self, skills):
+        cols = sorted({self.tool_index[s.strip().lower()] for s in skills if s.strip().lower() in self.tool_index})
+        vector = np.zeros(len(self.tool_index))
+        vector[cols] = self.tool_idf[cols]
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector), cols
+
+    def _user_competency_vector(self, competency_ratings):
+        ratings = {name.lower(): rating for name, rating in competency_ratings.items()}
+        vector = np.array([float(ratings.get(name, 0) or 0) for name in self.competency_names]) / 10.0
+        return vector, vector > 0
+
+    def match(self, skills, competency_ratings=None, top_k=10):
+        """
+        Score every occupation against the user's skills and competency ratings.
+
+        Args:
+            skills: List of skill strings (matched against ASC technology tools)
+            competency_ratings: {competency_name: rating 0-10}, unrated competencies are 0
+            top_k: Number of matches to return
+
+        Returns:
+            list: Dicts with title, anzsco_code, match_score (0-100) and matched_tools, best first
+        """
+        if not self.occupations:
+            return []
+
+        tool_vector, user_cols = self._user_tool_vector(skills or [])
+        tool_scores = self.tool_matrix @ tool_vector if user_cols else np.zeros(len(self.occupations))
+
+        competency_vector, rated = self._user_competency_vector(competency_ratings or {})
+        if rated.any():
+            gaps = np.clip(self.competency_matrix[:, rated] - competency_vector[rated], 0, None)
+            competency_scores = np.where(self.has_competency_data, 1 - gaps.mean(axis=1), 0)
+        else:
+            competency_scores = None
+
+        if user_cols and competency_scores is not None:
+            scores = TOOL_WEIGHT * tool_scores + (1 - TOOL_WEIGHT) * competency_scores
+        elif competency_scores is not None:
+            scores = competency_scores
+        else:
+            scores = tool_scores
+
+        percentages = np.rint(scores * 100).astype(int)
+        candidates = np.flatnonzero(percentages >= MIN_MATCH_SCORE)
+        if candidates.size == 0:
+            return []
+        if candidates.size > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        user_presence = np.zeros(len(self.tool_index), dtype=bool)
+        user_presence[user_cols] = True
+        matches = []
+        for row in candidates:
+            occupation_cols = self.tool_presence.indices[self.tool_presence.indptr[row]:self.tool_presence.indptr[row + 1]]
+            matches.append({
+                **self.occupations[row],
+                "match_score": int(percentages[row]),
+                "matched_tools": [self.tool_names[c] for c in occupation_cols if user_presence[c]],
+            })
+        return matches
+
+
+_matcher = None
+_matcher_source = None
+_matcher_lock = threading.Lock()
+
+
+def get_career_matcher():
+    """Return the process-wide matcher, rebuilding it when the knowledge base reloads."""
+    global _matcher, _matcher_source
+    entries = load_asc_knowledge_base()
+    with _matcher_lock:
+        if _matcher is None or _matcher_source is not entries:
+            _matcher = CareerMatcher(entries)
+            _matcher_source = entries
+        return _matcher
+
+
+def compute_career_matches(skills, competency_rows=None, top_k=10):
+    """
+    Match a user profile to ASC occupations without calling an LLM.
+
+    Args:
+        skills: List of skill strings
+        competency_rows: Rows from user_competencies ({"competency_name", "rating"})
+        top_k: Number of matches to return
+    """
+    ratings = {
+        row.get("competency_name"): row.get("rating", 0)
+        for row in competency_rows or []
+        if row.get("competency_name")
+    }
+    return get_career_matcher().match(skills, ratings, top_k=top_k)
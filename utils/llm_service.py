@@ -4,31 +4,66 @@ import streamlit as st
 from utils.agents.agent_manager import AgentManager
 
 
-def generate_response(supabase, user, user_query):
-    """
-    Generate a response using the agent system.
+def _get_agent_manager(supabase, user):
     """
+    Return the session's initialized agent manager.
 
+    Returns:
+        tuple: (AgentManager or None, error message or None)
+    """
     api_key = st.session_state.get("openai_api_key")
 
     if not api_key:
-        return "Please provide an OpenAI API key in the sidebar to use advanced features."
+        return None, "Please provide an OpenAI API key in the sidebar to use advanced features."
 
-    try:
-        if "agent_manager" not in st.session_state:
-            st.session_state.agent_manager = AgentManager(api_key=api_key, supabase=supabase, user=user)
+    if "agent_manager" not in st.session_state:
+        st.session_state.agent_manager = AgentManager(api_key=api_key, supabase=supabase, user=user)
+
+    agent_manager = st.session_state.agent_manager
+
+    if "triage_agent" not in st.session_state:
+        triage_agent = agent_manager.initialize_agents()
+        if not triage_agent:
+            return None, "Failed to initialize the agent system. Please check your API key and try again."
+        st.session_state.triage_agent = triage_agent
 
-        agent_manager = st.session_state.agent_manager
+    return agent_manager, None
 
-        if "triage_agent" not in st.session_state:
-            triage_agent = agent_manager.initialize_agents()
-            if not triage_agent:
-                return "Failed to initialize the agent system. Please check your API key and try again."
-            st.session_state.triage_agent = triage_agent
+
+def generate_response(supabase, user, user_query):
+    """
+    Generate a response using the agent system.
+    """
+
+    try:
+        agent_manager, error = _get_agent_manager(supabase, user)
+        if error:
+            return error
 
         return agent_manager.process_user_query(user_query)
 
     except Exception as e:
         error_msg = str(e)
         print(f"Error in generate_response: {error_msg}")
-        return f"I encountered an issue processing your request: {error_msg}. Please try again or check your API key."
\ No newline at end of file
+        return f"I encountered an issue processing your request: {error_msg}. Please try again or check your API key."
+
+
+def generate_response_stream(supabase, user, user_query):
+    """
+    Generate a response using the agent system, yielding events as they arrive.
+
+    See AgentManager.stream_user_query for the event format.
+    """
+
+    try:
+        agent_manager, error = _get_agent_manager(supabase, user)
+        if error:
+            yield {"type": "error", "content": error}
+            return
+
+        yield from agent_manager.stream_user_query(user_query)
+
+    except Exception as e:
+        error_msg = str(e)
+        print(f"Error in generate_response_stream: {error_msg}")
+        yield {"type": "error", "content": f"I encountered an issue processing your request: {error_msg}. Please try again or check your API key."}
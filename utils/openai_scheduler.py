@@ -0,0 +1,226 @@
+# utils/openai_scheduler.py
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+from openai import RateLimitError
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+# Requests and tokens per minute, per API key and model. Override with OPENAI_RATE_LIMITS, e.g.
+# '{"gpt-4o": {"rpm": 5000, "tpm": 800000}}'.
+DEFAULT_RATE_LIMITS = {
+    "gpt-4o-mini": {"rpm": 500, "tpm": 200000},
+    "gpt-4o": {"rpm": 500, "tpm": 30000},
+    "gpt-4": {"rpm": 500, "tpm": 10000},
+    "default": {"rpm": 500, "tpm": 30000},
+}
+MAX_RETRIES = int(os.environ.get("OPENAI_SCHEDULER_MAX_RETRIES", 4))
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+# How often a waiting background call re-checks whether interactive calls are still queued.
+YIELD_POLL_SECONDS = 0.05
+
+
+def _load_rate_limits():
+    limits = dict(DEFAULT_RATE_LIMITS)
+    try:
+        limits.update(json.loads(os.environ.get("OPENAI_RATE_LIMITS", "{}")))
+    except ValueError as e:
+        print(f"Ignoring invalid OPENAI_RATE_LIMITS: {e}")
+    return limits
+
+
+def estimate_tokens(text, max_output_tokens=0):
+    """Rough token estimate for a request: about four characters per token plus the output allowance."""
+    return len(text) // 4 + max_output_tokens
+
+
+def is_quota_error(error):
+    """Quota exhaustion also returns 429 but will not succeed on retry."""
+    return getattr(error, "code", None) == "insufficient_quota" or "insufficient_quota" in str(error)
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding at most one minute of capacity."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def consume(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+    def drain(self):
+        self.tokens = min(self.tokens, 0.0)
+
+
+class OpenAIScheduler:
+    """
+    Process-wide admission control for OpenAI calls.
+
+    Each (API key, model) pair gets a request bucket and a token bucket sized
+    from its per-minute limits. Interactive calls are admitted ahead of
+    background calls for the same key, and 429 responses are retried with
+    jittered exponential backoff (honouring Retry-After) after draining the
+    buckets so other callers back off too. Works from both threads and the
+    agent runtime loop.
+    """
+
+    def __init__(self, rate_limits=None):
+        self.rate_limits = rate_limits or _load_rate_limits()
+        self._buckets = {}
+        self._waiting = {}
+        self._lock = threading.Lock()
+        self._stats = {"admitted": 0, "rate_limited": 0, "retries": 0, "failed": 0, "wait_seconds": 0.0}
+
+    def _limits_for(self, model):
+        for prefix in sorted(self.rate_limits, key=len, reverse=True):
+            if prefix != "default" and model and model.startswith(prefix):
+                return self.rate_limits[prefix]
+        return self.rate_limits["default"]
+
+    def _bucket_key(self, api_key, model):
+        account = hashlib.sha256((api_key or "").encode()).hexdigest()[:16]
+        return account, model or "default"
+
+    def _buckets_for(self, key):
+        if key not in self._buckets:
+            limits = self._limits_for(key[1])
+            self._buckets[key] = (TokenBucket(limits["rpm"]), TokenBucket(limits["tpm"]))
+        return self._buckets[key]
+
+    def _try_acquire(self, key, tokens, priority):
+        """Admit the call if capacity allows. Returns 0 when admitted, otherwise seconds to wait."""
+        with self._lock:
+            if priority > INTERACTIVE and self._waiting.get((key[0], INTERACTIVE), 0) > 0:
+                return YIELD_POLL_SECONDS
+            requests, token_bucket = self._buckets_for(key)
+            now = time.monotonic()
+            wait = max(requests.wait_time(1, now), token_bucket.wait_time(tokens, now))
+            if wait == 0:
+                requests.consume(1)
+                token_bucket.consume(tokens)
+                self._stats["admitted"] += 1
+            return wait
+
+    def _enter_queue(self, key, priority):
+        with self._lock:
+            self._waiting[(key[0], priority)] = self._waiting.get((key[0], priority), 0) + 1
+
+    def _leave_queue(self, key, priority, waited):
+        with self._lock:
+            self._waiting[(key[0], priority)] -= 1
+            self._stats["wait_seconds"] += waited
+
+    def acquire(self, model, estimated_tokens, priority=INTERACTIVE, api_key=None):
+        """Block the calling thread until the call may be sent."""
+        key = self._bucket_key(api_key, model)
+        start = time.monotonic()
+        self._enter_queue(key, priority)
+        try:
+            while True:
+                wait = self._try_acquire(key, estimated_tokens, priority)
+                if wait == 0:
+                    return
+                time.sleep(min(wait, 1.0))
+        finally:
+            self._leave_queue(key, priority, time.monotonic() - start)
+
+    async def acquire_async(self, model, estimated_tokens, priority=INTERACTIVE, api_key=None):
+        """Wait without blocking the event loop until the call may be sent."""
+        key = self._bucket_key(api_key, model)
+        start = time.monotonic()
+        self._enter_queue(key, priority)
+        try:
+            while True:
+                wait = self._try_acquire(key, estimated_tokens, priority)
+                if wait == 0:
+                    return
+                await asyncio.sleep(min(wait, 1.0))
+        finally:
+            self._leave_queue(key, priority, time.monotonic() - start)
+
+    def backoff_after_rate_limit(self, model, api_key, error, attempt):
+        """Record a 429 and return the backoff delay, or raise when retrying is pointless."""
+        with self._lock:
+            self._stats["rate_limited"] += 1
+            if is_quota_error(error) or attempt >= MAX_RETRIES:
+                self._stats["failed"] += 1
+                raise error
+            self._stats["retries"] += 1
+            for bucket in self._buckets_for(self._bucket_key(api_key, model)):
+                bucket.drain()
+
+        retry_after = None
+        response = getattr(error, "response", None)
+        if response is not None:
+            try:
+                retry_after = float(response.headers.get("retry-after"))
+            except (TypeError, ValueError):
+                retry_after = None
+        backoff = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)
+        delay = max(retry_after or 0.0, backoff * random.uniform(0.5, 1.5))
+        print(f"OpenAI rate limit for {model}, retrying in {delay:.1f}s (attempt {attempt + 1}/{MAX_RETRIES})")
+        return delay
+
+    def call(self, fn, model, estimated_tokens, priority=INTERACTIVE, api_key=None):
+        """Run a blocking OpenAI call under the model's limits, retrying on 429."""
+        attempt = 0
+        while True:
+            self.acquire(model, estimated_tokens, priority, api_key)
+            try:
+                return fn()
+            except RateLimitError as e:
+                time.sleep(self.backoff_after_rate_limit(model, api_key, e, attempt))
+                attempt += 1
+
+    async def call_async(self, coro_factory, model, estimated_tokens, priority=INTERACTIVE, api_key=None):
+        """Await an OpenAI call created by coro_factory under the model's limits, retrying on 429."""
+        attempt = 0
+        while True:
+            await self.acquire_async(model, estimated_tokens, priority, api_key)
+            try:
+                return await coro_factory()
+            except RateLimitError as e:
+                await asyncio.sleep(self.backoff_after_rate_limit(model, api_key, e, attempt))
+                attempt += 1
+
+    def metrics(self):
+        """Return queue depth by priority and cumulative admission statistics."""
+        with self._lock:
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for (_, priority), count in self._waiting.items():
+                depth[PRIORITY_NAMES[priority]] += count
+            return {"queue_depth": depth, **self._stats, "wait_seconds": round(self._stats["wait_seconds"], 2)}
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_openai_scheduler():
+    """Return the process-wide OpenAI scheduler."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = OpenAIScheduler()
+    return _scheduler
@@ -0,0 +1,204 @@
+# utils/pii_masking.py
+import heapq
+import os
+import re
+import threading
+
+# spaCy is optional: without it (or with PII_NER_ENABLED=0) only the pattern rules run.
+PII_NER_ENABLED = os.environ.get("PII_NER_ENABLED", "1") == "1"
+SPACY_MODEL = os.environ.get("SPACY_MODEL", "en_core_web_sm")
+# Masking only needs the entity recognizer, which in the en_core_web models has its own embedding layer.
+SPACY_EXCLUDED_COMPONENTS = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "senter"]
+ENTITY_TAGS = {"PERSON": "NAME", "GPE": "LOCATION"}
+
+CITIES = ["sydney", "melbourne", "brisbane", "perth", "adelaide", "hobart", "canberra", "darwin"]
+STATES = ["NSW", "VIC", "QLD", "SA", "WA", "TAS", "ACT", "NT"]
+
+STREET_TYPES = [
+    "street", "st", "road", "rd", "avenue", "ave", "drive", "dr", "lane", "ln", "court", "ct", "place", "pl",
+    "crescent", "cres", "boulevard", "blvd", "parade", "pde", "terrace", "tce", "highway", "hwy", "way",
+    "close", "cl", "circuit", "cct", "grove", "gr", "square", "sq", "esplanade", "esp",
+]
+
+EMAIL_PATTERN = r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b"
+# Australian mobiles: 04xx xxx xxx, 4xx xxx xxx or +61 4xx xxx xxx.
+PHONE_PATTERN = r"(?<![\w+])(?:\+61[\s-]?|0)?4\d{2}[\s-]?\d{3}[\s-]?\d{3}(?!\d)"
+
+
+def trie_pattern(terms):
+    """
+    Build a regex alternation for literal terms that branches on shared
+    prefixes, so matching cost depends on term length rather than term count.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        end = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if end else body
+
+    return build(trie)
+
+
+def _address_pattern(states):
+    """
+    Street number, up to four name words and a street type, optionally followed
+    by a comma and suburb and by a state and postcode. Every repetition is
+    bounded, so a failed match costs constant work per starting digit.
+    """
+    street = rf"\b\d{{1,5}}[A-Za-z]?(?:/\d{{1,5}})?\s+(?:[A-Za-z'-]+\s+){{0,4}}(?i:{trie_pattern(STREET_TYPES)})\b\.?"
+    suburb = r"(?:,\s*[A-Za-z'-]+(?:\s[A-Za-z'-]+){0,2}?)?"
+    # Without a comma, trailing words only count as a suburb when a state and postcode follow.
+    state_postcode = rf"(?:,?\s*(?:[A-Za-z'-]+\s+){{0,3}}(?:{trie_pattern(states)})[\s-]*\d{{4}}\b)?"
+    return street + suburb + state_postcode
+
+
+class PIIMasker:
+    """
+    Masks emails, phone numbers, street addresses, cities and states in one
+    left-to-right pass over the text.
+
+    All rules are compiled once into a single alternation of named groups.
+    Single-word cities and states are matched as plain words and looked up in
+    sets, so the number of locality terms does not change the cost per word;
+    multi-word terms (rare) are compiled as a prefix trie.
+    """
+
+    def __init__(self, cities=CITIES, states=STATES):
+        self.cities = {c.lower() for c in cities if " " not in c.strip()}
+        self.states = {s for s in states if " " not in s.strip()}
+        phrases = sorted({c.lower() for c in cities} - self.cities)
+        rules = [
+            ("EMAIL", EMAIL_PATTERN),
+            ("PHONE", PHONE_PATTERN),
+            ("ADDRESS", _address_pattern(states)),
+        ]
+        if phrases:
+            rules.append(("CITY", rf"\b(?i:{trie_pattern(phrases)})\b"))
+        rules.append(("WORD", r"\b[A-Za-z]+\b"))
+        self.pattern = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in rules))
+
+    def _replacement(self, match):
+        """Return the mask for a match, or None when a plain word is not a locality."""
+        tag = match.lastgroup
+        if tag != "WORD":
+            return f"[{tag}]"
+        word = match.group()
+        if word in self.states:
+            return "[STATE]"
+        if word.lower() in self.cities:
+            return "[CITY]"
+        return None
+
+    def _replace(self, match):
+        return self._replacement(match) or match.group()
+
+    def mask(self, text, entities=()):
+        """
+        Return the text with every PII match replaced by its [TAG].
+
+        Args:
+            text: Text to mask
+            entities: Optional (start, end, tag) spans, e.g. from NER, masked
+                alongside the pattern matches; where spans overlap the one that
+                starts first (then the longer one) wins
+        """
+        if not entities:
+            return self.pattern.sub(self._replace, text)
+
+        pattern_spans = (
+            (m.start(), m.end(), replacement)
+            for m in self.pattern.finditer(text)
+            for replacement in [self._replacement(m)]
+            if replacement
+        )
+        entity_spans = ((start, end, f"[{tag}]") for start, end, tag in sorted(entities))
+        pieces = []
+        position = 0
+        for start, end, replacement in heapq.merge(pattern_spans, entity_spans, key=lambda s: (s[0], -s[1])):
+            if start < position:
+                continue
+            pieces.append(text[position:start])
+            pieces.append(replacement)
+            position = end
+        pieces.append(text[position:])
+        return "".join(pieces)
+
+
+_masker = None
+_masker_lock = threading.Lock()
+
+
+def get_pii_masker():
+    """Return the process-wide masker built from the default locality lists."""
+    global _masker
+    if _masker is None:
+        with _masker_lock:
+            if _masker is None:
+                _masker = PIIMasker()
+    return _masker
+
+
+_nlp = None
+_nlp_loaded = False
+_nlp_lock = threading.Lock()
+
+
+def get_ner_pipeline():
+    """
+    Load the spaCy NER pipeline on first use and return it, or None when NER
+    is disabled or spaCy or the model is not installed.
+    """
+    global _nlp, _nlp_loaded
+    if not _nlp_loaded:
+        with _nlp_lock:
+            if not _nlp_loaded:
+                if PII_NER_ENABLED:
+                    try:
+                        import spacy
+                        _nlp = spacy.load(SPACY_MODEL, exclude=SPACY_EXCLUDED_COMPONENTS)
+                    except (ImportError, OSError) as e:
+                        print(f"spaCy NER unavailable, masking with patterns only: {e}")
+                _nlp_loaded = True
+    return _nlp
+
+
+def entity_spans(doc):
+    """Return (start, end, tag) character spans for the entities masking cares about."""
+    return [
+        (ent.start_char, ent.end_char, ENTITY_TAGS[ent.label_])
+        for ent in doc.ents
+        if ent.label_ in ENTITY_TAGS
+    ]
+
+
+def mask_pii(text):
+    """Mask PII in one text, using NER for names and places when available."""
+    nlp = get_ner_pipeline()
+    entities = entity_spans(nlp(text)) if nlp is not None and text.strip() else ()
+    return get_pii_masker().mask(text, entities)
+
+
+def mask_pii_batch(texts, batch_size=16, n_process=1):
+    """
+    Mask many texts, streaming them through nlp.pipe so NER runs in batches
+    (and across n_process worker processes when n_process > 1).
+
+    Returns:
+        list: Masked texts in input order
+    """
+    texts = list(texts)
+    masker = get_pii_masker()
+    nlp = get_ner_pipeline()
+    if nlp is None:
+        return [masker.mask(text) for text in texts]
+    docs = nlp.pipe(texts, batch_size=batch_size, n_process=n_process)
+    return [masker.mask(text, entity_spans(doc)) for text, doc in zip(texts, docs)]
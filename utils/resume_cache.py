@@ -0,0 +1,125 @@
+# utils/resume_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils.pii_masking import PII_NER_ENABLED
+from utils.skill_gazetteer import get_skill_gazetteer
+
+RESUME_CACHE_PATH = os.environ.get("RESUME_CACHE_PATH", "data/cache/resumes.sqlite")
+RESUME_CACHE_MAX_BYTES = int(os.environ.get("RESUME_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+# Bump when text extraction, masking or skill extraction changes what a resume produces.
+RESUME_EXTRACTOR_VERSION = "5"
+
+
+def extractor_version(api_key):
+    """
+    Everything besides the file bytes that decides what extraction produces:
+    the code version, the skill vocabulary, NER and whether the LLM is available.
+    """
+    return ":".join([
+        RESUME_EXTRACTOR_VERSION,
+        get_skill_gazetteer().fingerprint,
+        "ner" if PII_NER_ENABLED else "patterns",
+        "llm" if api_key else "local",
+    ])
+
+
+def file_digest(file_bytes):
+    """SHA-256 of the uploaded file, stable across sessions, processes and restarts."""
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def resume_cache_key(file_bytes, version):
+    """Key extraction results by the file content and the extractor that produced them."""
+    return hashlib.sha256(f"{file_digest(file_bytes)}:{version}".encode()).hexdigest()
+
+
+class ResumeCache:
+    """
+    SQLite store of resume extraction results (cleaned text, masked text and
+    skills) keyed by content hash, shared by every session and worker on the
+    host. Least recently used entries are evicted once the stored results
+    exceed `max_bytes`.
+    """
+
+    def __init__(self, path=RESUME_CACHE_PATH, max_bytes=RESUME_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS resumes ("
+                "key TEXT PRIMARY KEY, text TEXT, masked_text TEXT, skills TEXT, size INTEGER, "
+                "created_at REAL, last_used REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS resumes_last_used ON resumes (last_used)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key):
+        """
+        Return the cached extraction for the key.
+
+        Returns:
+            dict: {"text", "masked_text", "skills"}, or None on a miss
+        """
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT text, masked_text, skills FROM resumes WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    conn.execute("UPDATE resumes SET last_used = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error as e:
+            print(f"Resume cache read failed: {e}")
+            return None
+        if not row:
+            return None
+        return {"text": row[0], "masked_text": row[1], "skills": json.loads(row[2])}
+
+    def put(self, key, text, masked_text, skills):
+        """Store an extraction and evict least recently used entries beyond the size budget."""
+        skills_json = json.dumps(skills)
+        size = len(text.encode()) + len(masked_text.encode()) + len(skills_json)
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO resumes (key, text, masked_text, skills, size, created_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, text, masked_text, skills_json, size, now, now),
+                )
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM resumes").fetchone()[0]
+                if total > self.max_bytes:
+                    self._evict(conn, total - self.max_bytes)
+        except sqlite3.Error as e:
+            print(f"Resume cache write failed: {e}")
+
+    def _evict(self, conn, excess):
+        freed = 0
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM resumes ORDER BY last_used"):
+            if freed >= excess:
+                break
+            victims.append((key,))
+            freed += size
+        conn.executemany("DELETE FROM resumes WHERE key = ?", victims)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_resume_cache():
+    """Return the process-wide resume cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResumeCache()
+    return _cache
@@ -0,0 +1,337 @@
+# utils/resume_ingestion.py
+"""
+Headless bulk resume ingestion.
+
+Resumes flow through generator stages: text extraction (process pool), PII
+masking (batched NER), local skill extraction, LLM extraction for resumes the
+gazetteer cannot cover (bounded concurrency) and batched writes to
+user_skills. Every resume's outcome is appended to a checkpoint file: an
+interrupted run skips the completed ones and retries the failed ones.
+
+    python -m utils.resume_ingestion cohort.csv --checkpoint cohort.checkpoint.jsonl
+
+The CSV needs `user_id` and `path` columns. Writing other users' skills needs
+a service-role key in SUPABASE_SERVICE_KEY (falls back to SUPABASE_KEY).
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from utils.pii_masking import mask_pii_batch
+from utils.resume_cache import extractor_version, get_resume_cache, resume_cache_key
+from utils.resume_text import iter_resume_pages
+from utils.skill_gazetteer import get_skill_gazetteer
+from utils.supabase_data_utils import save_skills_for_users
+
+MIME_TYPES = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", os.cpu_count() or 1))
+INGEST_LLM_CONCURRENCY = int(os.environ.get("INGEST_LLM_CONCURRENCY", 4))
+INGEST_MASK_BATCH_SIZE = 32
+INGEST_WRITE_BATCH_SIZE = 100
+
+
+class _ResumeFile(io.BytesIO):
+    """In-memory resume with the `type` attribute iter_resume_pages expects."""
+
+    def __init__(self, path, data):
+        super().__init__(data)
+        self.name = os.path.basename(path)
+        self.type = MIME_TYPES.get(os.path.splitext(path)[1].lower(), "unknown")
+
+
+def _extract_text(path):
+    """Process pool task: read a resume file and return its cleaned text."""
+    with open(path, "rb") as f:
+        # Serial: the ingestion pool already spreads resumes across every core.
+        return " ".join(iter_resume_pages(_ResumeFile(path, f.read()), parallel=False))
+
+
+def _ordered_window(pool, tasks, max_in_flight):
+    """
+    Submit fn(arg) for each (job, fn, arg) and yield (job, future) in input
+    order, keeping at most max_in_flight tasks queued so the input streams.
+    Jobs with fn=None pass straight through with future=None.
+    """
+    window = deque()
+    for job, fn, arg in tasks:
+        window.append((job, pool.submit(fn, arg) if fn else None))
+        while len(window) > max_in_flight or (window and window[0][1] is None):
+            yield window.popleft()
+    while window:
+        yield window.popleft()
+
+
+def _batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ResumeIngestionPipeline:
+    """
+    Streaming pipeline over {"user_id", "path"} jobs.
+
+    Each stage is a generator over job dicts, so resumes move on as soon as
+    they are ready and memory is bounded by batch and in-flight sizes rather
+    than cohort size. Failed resumes (including ones where any LLM call
+    failed, so their skills would be partial) are neither cached nor written,
+    and are recorded as failed in the checkpoint so the next run retries them.
+    """
+
+    def __init__(self, supabase, api_key=None, checkpoint_path=None, workers=INGEST_WORKERS,
+                 llm_concurrency=INGEST_LLM_CONCURRENCY, write_batch_size=INGEST_WRITE_BATCH_SIZE,
+                 mask_processes=1):
+        self.supabase = supabase
+        self.api_key = api_key
+        self.checkpoint_path = checkpoint_path
+        self.workers = max(1, workers)
+        self.llm_concurrency = max(1, llm_concurrency)
+        self.write_batch_size = write_batch_size
+        self.mask_processes = mask_processes
+        self.version = extractor_version(api_key)
+        self.stats = {
+            "resumes": 0, "skipped": 0, "cached": 0, "failed": 0, "llm_calls": 0, "skills_written": 0,
+            "stage_seconds": {"extract": 0.0, "mask": 0.0, "local_skills": 0.0, "llm": 0.0, "write": 0.0},
+        }
+
+    def _completed(self):
+        """(user_id, path) pairs recorded as done in the checkpoint file by earlier runs."""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return set()
+        done = set()
+        with open(self.checkpoint_path, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    key = (entry["user_id"], entry["path"])
+                except (ValueError, KeyError):
+                    continue
+                # The latest entry for a resume wins, so a retried failure that succeeds counts as done.
+                if entry.get("status", "done") == "done":
+                    done.add(key)
+                else:
+                    done.discard(key)
+        return done
+
+    def _fail(self, job, stage, error):
+        job["error"] = f"{stage}: {error}"
+        print(f"Failed to ingest {job['path']} for {job['user_id']} ({job['error']})")
+
+    def stage_extract(self, jobs):
+        """Look each file up in the resume cache and extract the rest in a process pool."""
+        cache = get_resume_cache()
+
+        def plan():
+            for job in jobs:
+                start = time.perf_counter()
+                try:
+                    with open(job["path"], "rb") as f:
+                        job["cache_key"] = resume_cache_key(f.read(), self.version)
+                except OSError as e:
+                    self._fail(job, "read", e)
+                    yield job, None, None
+                    continue
+                cached = cache.get(job["cache_key"])
+                self.stats["stage_seconds"]["extract"] += time.perf_counter() - start
+                if cached:
+                    job.update(cached, cached_result=True)
+                    self.stats["cached"] += 1
+                    yield job, None, None
+                else:
+                    yield job, _extract_text, job["path"]
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            for job, future in _ordered_window(pool, plan(), self.workers * 2):
+                yield self._collect_extraction(job, future)
+
+    def _collect_extraction(self, job, future):
+        if future is None:
+            return job
+        start = time.perf_counter()
+        try:
+            job["text"] = future.result()
+        except Exception as e:
+            self._fail(job, "extract", e)
+        self.stats["stage_seconds"]["extract"] += time.perf_counter() - start
+        return job
+
+    def stage_mask(self, jobs):
+        """Mask PII in batches so NER runs through nlp.pipe."""
+        for batch in _batched(jobs, INGEST_MASK_BATCH_SIZE):
+            todo = [job for job in batch if "text" in job and "masked_text" not in job and "error" not in job]
+            if todo:
+                start = time.perf_counter()
+                try:
+                    masked = mask_pii_batch([job["text"] for job in todo], n_process=self.mask_processes)
+                    for job, masked_text in zip(todo, masked):
+                        job["masked_text"] = masked_text
+                except Exception as e:
+                    for job in todo:
+                        self._fail(job, "mask", e)
+                self.stats["stage_seconds"]["mask"] += time.perf_counter() - start
+            yield from batch
+
+    def stage_local_skills(self, jobs):
+        """Match the ASC gazetteer; decide which resumes still need the LLM."""
+        gazetteer = get_skill_gazetteer()
+        for job in jobs:
+            if "masked_text" in job and "skills" not in job and "error" not in job:
+                start = time.perf_counter()
+                result = gazetteer.extract(job["masked_text"])
+                job["skills"] = result["skills"]
+                if self.api_key and (result["needs_llm"] or result["ambiguous"]):
+                    job["llm"] = "extract" if result["needs_llm"] else "confirm"
+                    job["ambiguous"] = result["ambiguous"]
+                self.stats["stage_seconds"]["local_skills"] += time.perf_counter() - start
+            yield job
+
+    def _llm_skills(self, job):
+        # Imported here: the upload-path module pulls in Streamlit, which pool workers never need.
+        from utils.resume_parser import confirm_ambiguous_skills, extract_skills_with_agent
+
+        if job["llm"] == "extract":
+            skills, ok = extract_skills_with_agent(job["masked_text"], self.api_key, with_status=True)
+        else:
+            skills, ok = confirm_ambiguous_skills(job["ambiguous"], self.api_key, with_status=True)
+        if not ok:
+            # Partial skills must not be cached, written or checkpointed as done.
+            raise RuntimeError("an LLM skill extraction call failed")
+        return skills
+
+    def stage_llm(self, jobs):
+        """Run LLM extraction for the resumes that need it, at most llm_concurrency at a time."""
+        with ThreadPoolExecutor(max_workers=self.llm_concurrency) as pool:
+            tasks = ((job, self._llm_skills if job.get("llm") else None, job) for job in jobs)
+            for job, future in _ordered_window(pool, tasks, self.llm_concurrency * 2):
+                if future is not None:
+                    start = time.perf_counter()
+                    self.stats["llm_calls"] += 1
+                    try:
+                        extra = future.result()
+                        job["skills"] = get_skill_gazetteer().merge(job["skills"], extra)
+                    except Exception as e:
+                        self._fail(job, "llm", e)
+                    self.stats["stage_seconds"]["llm"] += time.perf_counter() - start
+                if "error" not in job and not job.get("cached_result") and job.get("text"):
+                    get_resume_cache().put(job["cache_key"], job["text"], job["masked_text"], job["skills"])
+                yield job
+
+    def stage_write(self, jobs):
+        """Upsert skills in batches, then record the batch in the checkpoint."""
+        for batch in _batched(jobs, self.write_batch_size):
+            ok = [job for job in batch if "error" not in job]
+            self.stats["failed"] += len(batch) - len(ok)
+            skills_by_user = {}
+            for job in ok:
+                skills_by_user.setdefault(job["user_id"], []).extend(job.get("skills", []))
+
+            start = time.perf_counter()
+            try:
+                self.stats["skills_written"] += save_skills_for_users(self.supabase, skills_by_user)
+            except Exception as e:
+                for job in ok:
+                    self._fail(job, "write", e)
+                self.stats["failed"] += len(ok)
+                ok = []
+            self.stats["stage_seconds"]["write"] += time.perf_counter() - start
+
+            self.stats["resumes"] += len(ok)
+            self._checkpoint(batch)
+            yield from batch
+
+    def _checkpoint(self, jobs):
+        if not self.checkpoint_path or not jobs:
+            return
+        with open(self.checkpoint_path, "a") as f:
+            for job in jobs:
+                entry = {"user_id": job["user_id"], "path": job["path"]}
+                if "error" in job:
+                    entry.update(status="failed", error=job["error"])
+                else:
+                    entry.update(status="done", skills=len(job["skills"]))
+                f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def run(self, jobs):
+        """
+        Process the jobs and return run statistics including throughput.
+
+        Args:
+            jobs: Iterable of {"user_id": str, "path": str}
+        """
+        start = time.perf_counter()
+        done = self._completed()
+
+        def pending():
+            for job in jobs:
+                if (job["user_id"], job["path"]) in done:
+                    self.stats["skipped"] += 1
+                    continue
+                yield dict(job)
+
+        stream = self.stage_extract(pending())
+        stream = self.stage_mask(stream)
+        stream = self.stage_local_skills(stream)
+        stream = self.stage_llm(stream)
+        for _ in self.stage_write(stream):
+            pass
+
+        elapsed = time.perf_counter() - start
+        self.stats["elapsed_seconds"] = round(elapsed, 2)
+        self.stats["resumes_per_second"] = round(self.stats["resumes"] / elapsed, 2) if elapsed else None
+        self.stats["stage_seconds"] = {k: round(v, 2) for k, v in self.stats["stage_seconds"].items()}
+        return self.stats
+
+
+def read_jobs(csv_path):
+    """Yield {"user_id", "path"} jobs from a CSV, resolving paths relative to the CSV."""
+    base = os.path.dirname(os.path.abspath(csv_path))
+    with open(csv_path, newline="") as f:
+        for row in csv.DictReader(f):
+            path = row["path"].strip()
+            yield {"user_id": row["user_id"].strip(), "path": os.path.normpath(os.path.join(base, path))}
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from supabase import create_client
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv", help="CSV with user_id and path columns")
+    parser.add_argument("--checkpoint", help="JSONL file recording each resume as done or failed (default: <csv>.checkpoint.jsonl)")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="Processes for text extraction")
+    parser.add_argument("--llm-concurrency", type=int, default=INGEST_LLM_CONCURRENCY)
+    parser.add_argument("--write-batch-size", type=int, default=INGEST_WRITE_BATCH_SIZE)
+    parser.add_argument("--mask-processes", type=int, default=1, help="spaCy nlp.pipe processes for NER")
+    parser.add_argument("--no-llm", action="store_true", help="Use the local gazetteer only")
+    args = parser.parse_args()
+
+    supabase = create_client(
+        os.environ.get("SUPABASE_URL"), os.environ.get("SUPABASE_SERVICE_KEY") or os.environ.get("SUPABASE_KEY")
+    )
+    pipeline = ResumeIngestionPipeline(
+        supabase,
+        api_key=None if args.no_llm else os.environ.get("OPENAI_API_KEY"),
+        checkpoint_path=args.checkpoint or f"{args.csv}.checkpoint.jsonl",
+        workers=args.workers,
+        llm_concurrency=args.llm_concurrency,
+        write_batch_size=args.write_batch_size,
+        mask_processes=args.mask_processes,
+    )
+    stats = pipeline.run(read_jobs(args.csv))
+    print(json.dumps(stats, indent=2))
@@ -1,29 +1,51 @@
-import PyPDF2
-import docx2txt
-import re
+import json
+import os
 import streamlit as st
-import spacy
-from openai import OpenAI
-import ast
+from concurrent.futures import ThreadPoolExecutor
+from openai import OpenAI, RateLimitError
 from utils.supabase_data_utils import save_user_skills_to_supabase
-
-
-@st.cache_resource
-def load_spacy_model():
-    return spacy.load("en_core_web_sm")
-
-nlp = load_spacy_model()
+from utils.openai_scheduler import BACKGROUND, estimate_tokens, get_openai_scheduler, is_quota_error
+from utils.pii_masking import mask_pii
+from utils.resume_cache import extractor_version, get_resume_cache, resume_cache_key
+from utils.resume_sections import find_skills_sections
+from utils.skill_gazetteer import get_skill_gazetteer
+from utils.resume_text import RESUME_MAX_CHARS, iter_resume_pages
+
+SKILL_CONFIRM_MODEL = "gpt-4o-mini"
+# Structured outputs need a model that supports json_schema response formats.
+SKILL_EXTRACTION_MODEL = os.environ.get("SKILL_EXTRACTION_MODEL", "gpt-4o")
+SKILL_CHUNK_CHARS = int(os.environ.get("SKILL_CHUNK_CHARS", 6000))
+SKILL_CHUNK_OVERLAP_CHARS = 200
+SKILL_MAX_OUTPUT_TOKENS = 1000
+SKILL_EXTRACTION_WORKERS = int(os.environ.get("SKILL_EXTRACTION_WORKERS", 4))
+SKILLS_SCHEMA = {
+    "name": "resume_skills",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {"skills": {"type": "array", "items": {"type": "string"}}},
+        "required": ["skills"],
+        "additionalProperties": False,
+    },
+}
 
 
 def parse_resume(uploaded_file, api_key=None, supabase=None, user=None):
-    resume_text = extract_text_from_resume(uploaded_file)
+    cache_key = resume_cache_key(uploaded_file.getvalue(), extractor_version(api_key))
+    cached = get_resume_cache().get(cache_key)
+    if cached:
+        resume_text, masked_text, skills = cached["text"], cached["masked_text"], cached["skills"]
+    else:
+        resume_text = extract_text_from_resume(uploaded_file)
+        masked_text = mask_pii_spacy_au(resume_text)
+        skills, complete = extract_skills_from_resume(masked_text, api_key, with_status=True)
+        # A result degraded by a failed LLM call would otherwise be served for this file in every later session.
+        if resume_text and complete:
+            get_resume_cache().put(cache_key, resume_text, masked_text, skills)
 
-    masked_text = mask_pii_spacy_au(resume_text)
     st.markdown("### 🔍 Masked Resume Text:")
     st.code(masked_text)
 
-    skills = extract_skills_from_resume(masked_text, api_key)
-
     if "resume_skills" not in st.session_state:
         st.session_state.resume_skills = []
 
@@ -49,67 +71,142 @@ def parse_resume(uploaded_file, api_key=None, supabase=None, user=None):
 
 
 def extract_text_from_resume(uploaded_file):
-    text = ""
     try:
-        file_type = uploaded_file.type
-        if "pdf" in file_type:
-            pdf_reader = PyPDF2.PdfReader(uploaded_file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-        elif "docx" in file_type or "doc" in file_type:
-            text = docx2txt.process(uploaded_file)
-        else:
-            raise ValueError(f"Unsupported file type: {file_type}")
-        return clean_text(text)
+        text = " ".join(iter_resume_pages(uploaded_file))
+        if len(text) >= RESUME_MAX_CHARS:
+            st.info("Your resume is long, so only its first pages were used for skill extraction.")
+        return text
     except Exception as e:
         st.error(f"Error extracting text from resume: {str(e)}")
         return ""
 
 
 def mask_pii_spacy_au(text):
-    doc = nlp(text)
-    masked_text = text
-
-    # --------- EMAIL ---------
-    masked_text = re.sub(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', '[EMAIL]', masked_text)
-
-    # --------- PHONE (Australian Mobile & General) ---------
-    masked_text = re.sub(r'(\+61[\s\-]?|0)?4\d{2}[\s\-]?\d{3}[\s\-]?\d{3}', '[PHONE]', masked_text)
-
-    # --------- FULL ADDRESSES ---------
-    masked_text = re.sub(
-        r'\b\d+\s[\w\s]+,\s*[\w\s]+,\s*(NSW|VIC|QLD|SA|WA|TAS|ACT|NT)[\s\-]*\d{4}\b',
-        '[ADDRESS]', masked_text, flags=re.IGNORECASE)
-
-    # --------- PARTIAL ADDRESSES (street + suburb, no postcode) ---------
-    masked_text = re.sub(
-        r'\b\d+\s[\w\s]+,\s*[\w\s]+',
-        '[ADDRESS]', masked_text, flags=re.IGNORECASE)
-
-    # --------- CITY NAMES ---------
-    cities = ['sydney', 'melbourne', 'brisbane', 'perth', 'adelaide', 'hobart', 'canberra', 'darwin']
-    for city in cities:
-        masked_text = re.sub(rf'\b{city}\b', '[CITY]', masked_text, flags=re.IGNORECASE)
-
-    # --------- STATE NAMES ---------
-    states = ['NSW', 'VIC', 'QLD', 'SA', 'WA', 'TAS', 'ACT', 'NT']
-    for state in states:
-        masked_text = re.sub(rf'\b{state}\b', '[STATE]', masked_text, flags=re.IGNORECASE)
-
-
-    return masked_text
+    return mask_pii(text)
+
+
+def extract_skills_from_resume(masked_text, api_key, with_status=False):
+    """
+    Extract technical skills, locally where possible.
+
+    The ASC gazetteer handles most resumes without an API call. The LLM
+    extractor is only used when the gazetteer recognises too little of the
+    resume's skills section, and a small confirmation call is made for
+    everyday-word hits (e.g. "Go", "Excel") found outside a skills section.
+
+    With with_status=True, returns (skills, complete) instead, where complete
+    is False when an LLM call failed and the skills may be partial.
+    """
+    gazetteer = get_skill_gazetteer()
+    result = gazetteer.extract(masked_text)
+    skills = result["skills"]
+    extra, complete = [], True
+    if api_key and result["needs_llm"]:
+        extra, complete = extract_skills_with_agent(masked_text, api_key, with_status=True)
+    elif api_key and result["ambiguous"]:
+        extra, complete = confirm_ambiguous_skills(result["ambiguous"], api_key, with_status=True)
+
+    skills = gazetteer.merge(skills, extra)
+    return (skills, complete) if with_status else skills
+
+
+def confirm_ambiguous_skills(candidates, api_key, with_status=False):
+    """
+    Ask the model which ambiguous gazetteer hits are real technical skills.
+
+    Args:
+        candidates: {skill: surrounding resume text}
+        api_key: OpenAI API key
+        with_status: Return (confirmed, ok) so callers can tell a failed call from "none confirmed"
+
+    Returns:
+        list: The confirmed skills
+    """
+    # Retries are left to the OpenAI scheduler.
+    client = OpenAI(api_key=api_key, max_retries=0)
+    lines = "\n".join(f'- {skill}: "...{context}..."' for skill, context in candidates.items())
+    prompt = f"""
+Each line below names a possible technical skill and the resume text it was found in.
+Return only the skills that the text uses as a technology, tool, programming language or platform
+(for example "Go" the language, not the verb "to go"), spelled exactly as given.
 
+{lines}
+"""
+    try:
+        confirmed = set(_request_skill_list(client, api_key, SKILL_CONFIRM_MODEL, prompt, max_tokens=100))
+        skills, ok = [skill for skill in candidates if skill in confirmed], True
+    except Exception as e:
+        print(f"Ambiguous skill confirmation failed: {e}")
+        skills, ok = [], False
+    return (skills, ok) if with_status else skills
 
-def extract_skills_from_resume(masked_text, api_key):
-    return extract_skills_with_agent(masked_text, api_key)
 
-def extract_skills_with_agent(resume_text, api_key):
-    client = OpenAI(api_key=api_key)
+def _request_skill_list(client, api_key, model, prompt, max_tokens):
+    """Run a scheduled chat completion constrained to SKILLS_SCHEMA and return the lowercased skills."""
+    response = get_openai_scheduler().call(
+        lambda: client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": "You are a helpful resume parser."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0,
+            max_tokens=max_tokens,
+            response_format={"type": "json_schema", "json_schema": SKILLS_SCHEMA},
+        ),
+        model=model,
+        estimated_tokens=estimate_tokens(prompt, max_tokens),
+        priority=BACKGROUND,
+        api_key=api_key,
+    )
+    message = response.choices[0].message
+    if getattr(message, "refusal", None) or not message.content:
+        return []
+    return [s.strip().lower() for s in json.loads(message.content)["skills"] if s.strip()]
+
+
+def chunk_text(text, max_chars=SKILL_CHUNK_CHARS, overlap=SKILL_CHUNK_OVERLAP_CHARS):
+    """Split text into chunks of at most max_chars, breaking on whitespace, with a small overlap."""
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + max_chars, len(text))
+        if end < len(text):
+            space = text.rfind(" ", start + max_chars // 2, end)
+            end = space if space > 0 else end
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return [chunk for chunk in chunks if chunk]
+
+
+def extract_skills_with_agent(resume_text, api_key, with_status=False):
+    """
+    LLM skill extraction for resumes the gazetteer cannot cover.
+
+    Only the detected skills sections are sent when the resume has any.
+    Long input is split into chunks that are extracted concurrently and
+    merged, and replies are constrained to a JSON schema.
+
+    With with_status=True, returns (skills, ok) instead, where ok is False
+    when any chunk failed and the skills are partial.
+    """
+    # Retries are left to the OpenAI scheduler.
+    client = OpenAI(api_key=api_key, max_retries=0)
+
+    sections = find_skills_sections(resume_text)
+    if sections:
+        source = "the skills sections of a resume"
+        text = " ... ".join(resume_text[start:end].strip() for start, end in sections)
+    else:
+        source = "a resume"
+        text = resume_text
 
-    prompt = f"""
+    prompts = [f"""
 You are a resume parsing assistant.
 
-Extract only technical skills listed under the "Technologies" section of the resume. Focus only on lines under headings like "Proficient", "Familiar", or similar. Do not infer any soft skills or personality traits unless explicitly listed under a skills heading.
+The text below is taken from {source}. Extract only technical skills listed under the "Technologies" section of the resume. Focus only on lines under headings like "Proficient", "Familiar", or similar. Do not infer any soft skills or personality traits unless explicitly listed under a skills heading.
 Include only:
 - Programming languages
 - Tools and libraries
@@ -121,48 +218,39 @@ Ignore:
 - Descriptive phrases, soft skills, business terms, or general qualities
 - Any duplicate or redundant terms
 - Don't include anything from extra sections like "Experience", "Education", or "Projects"
-Return the result as a **valid Python list of lowercase strings**.
+Return every skill you find, in lowercase. Return an empty list if there are none.
 
-Resume:
+Text:
 \"\"\"
-{resume_text}
+{chunk}
 \"\"\"
-"""
-
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a helpful resume parser."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=300
-        )
-        content = response.choices[0].message.content.strip()
-
-        try:
-            skills = ast.literal_eval(content)
-            if isinstance(skills, list):
-                return [s.strip().lower() for s in skills if isinstance(s, str)]
-            else:
-                return []
-        except:
-            lowered = content.lower()
-            if "no skills can be extracted" in lowered or "no valid skill section" in lowered:
-                return []
-            else:
-                skills = [s.strip().lower() for s in re.findall(r"'(.*?)'", content)]
-                return skills if skills else []
-
-    except Exception as e:
-        st.warning(f"Agent skill extraction failed: {str(e)}")
-        return []
-
-
-
-def clean_text(text):
-    text = re.sub(r'\n+', '\n', text)
-    text = re.sub(r'\s+', ' ', text)
-    text = text.replace('\xa0', ' ')
-    return text.strip()
\ No newline at end of file
+""" for chunk in chunk_text(text)]
+
+    skills = []
+    errors = []
+    with ThreadPoolExecutor(max_workers=min(SKILL_EXTRACTION_WORKERS, len(prompts) or 1)) as pool:
+        futures = [
+            pool.submit(_request_skill_list, client, api_key, SKILL_EXTRACTION_MODEL, prompt, SKILL_MAX_OUTPUT_TOKENS)
+            for prompt in prompts
+        ]
+        for future in futures:
+            try:
+                chunk_skills = future.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+            for skill in chunk_skills:
+                if skill not in skills:
+                    skills.append(skill)
+
+    # Streamlit calls must stay on the script thread, so failures are reported here.
+    if errors:
+        e = errors[0]
+        print(f"Skill extraction failed for {len(errors)} of {len(prompts)} chunk(s): {e}")
+        if isinstance(e, RateLimitError) and is_quota_error(e):
+            st.warning("Skill extraction failed: the API quota has been reached. Please update your API key.")
+        elif isinstance(e, RateLimitError):
+            st.warning("Skill extraction is busy right now. Please upload your resume again in a minute.")
+        else:
+            st.warning(f"Agent skill extraction failed: {str(e)}")
+    return (skills, not errors) if with_status else skills
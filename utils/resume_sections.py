@@ -0,0 +1,52 @@
+# utils/resume_sections.py
+import re
+
+# Resume text is whitespace-collapsed by clean_text, so headings are found inline:
+# a capitalised heading word, optionally followed by a colon.
+SKILLS_HEADINGS = re.compile(
+    r"\b(technical skills|key skills|core skills|skills(?: and tools)?|skill set|technologies|tech stack|"
+    r"tools(?: and| &) technologies|technical proficienc(?:y|ies)|programming languages|"
+    r"proficient(?: in)?|familiar(?: with)?)\b:?",
+    re.IGNORECASE,
+)
+OTHER_HEADINGS = re.compile(
+    r"\b(professional experience|work experience|experience|employment(?: history)?|work history|"
+    r"education|projects|certifications?|references|summary|profile|awards|interests|publications|"
+    r"volunteering|languages spoken)\b:?",
+    re.IGNORECASE,
+)
+# A skills section with no following heading ends after this many characters.
+MAX_SECTION_CHARS = 1500
+
+
+def _is_heading(match):
+    return match.group()[0].isupper()
+
+
+def find_skills_sections(text):
+    """
+    Locate skills-style sections ("Technical Skills", "Technologies",
+    "Proficient", ...) in cleaned resume text.
+
+    Returns:
+        list: (start, end) character spans, merged where sections are adjacent
+    """
+    ends = [m.start() for m in OTHER_HEADINGS.finditer(text) if _is_heading(m)]
+    spans = []
+    for match in SKILLS_HEADINGS.finditer(text):
+        if not _is_heading(match):
+            continue
+        start = match.end()
+        end = min([e for e in ends if e > start] + [start + MAX_SECTION_CHARS, len(text)])
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], max(spans[-1][1], end))
+        else:
+            spans.append((start, end))
+    return spans
+
+
+def split_section_items(section_text):
+    """Split a skills section into its listed items (comma, pipe, bullet or semicolon separated)."""
+    section_text = SKILLS_HEADINGS.sub(",", section_text)
+    items = re.split(r"\s*(?:[,;|•·●▪]|\s-\s|\band\b)\s*", section_text)
+    return [item.strip(" .:") for item in items if item.strip(" .:")]
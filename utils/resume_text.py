@@ -0,0 +1,125 @@
+# utils/resume_text.py
+import io
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import PyPDF2
+import docx2txt
+
+# Extraction stops once either budget is reached; skill extraction never needs a whole portfolio.
+RESUME_MAX_PAGES = int(os.environ.get("RESUME_MAX_PAGES", 20))
+RESUME_MAX_CHARS = int(os.environ.get("RESUME_MAX_CHARS", 60000))
+# PDFs with at least this many pages (within the budget) are extracted in a process pool.
+RESUME_PARALLEL_MIN_PAGES = int(os.environ.get("RESUME_PARALLEL_MIN_PAGES", 8))
+RESUME_PDF_WORKERS = int(os.environ.get("RESUME_PDF_WORKERS", min(4, os.cpu_count() or 1)))
+# Pages per pool task. Small ranges let an early stop skip the rest of the document.
+RESUME_PDF_PAGES_PER_TASK = int(os.environ.get("RESUME_PDF_PAGES_PER_TASK", 2))
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def clean_text(text):
+    """Collapse all whitespace (newlines and non-breaking spaces included) to single spaces."""
+    return WHITESPACE.sub(" ", text).strip()
+
+
+def _extract_pdf_pages(path, page_numbers):
+    """Process pool task: extract and clean the given pages of the PDF at path."""
+    reader = PyPDF2.PdfReader(path)
+    return [clean_text(reader.pages[n].extract_text() or "") for n in page_numbers]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pdf_pool():
+    """Return the process-wide PDF extraction pool."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # Spawned workers import only this module, not Streamlit or the app.
+                _pool = ProcessPoolExecutor(
+                    max_workers=RESUME_PDF_WORKERS, mp_context=multiprocessing.get_context("spawn")
+                )
+    return _pool
+
+
+def _iter_pdf_pages(data, max_pages, parallel=True):
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    page_count = min(len(reader.pages), max_pages)
+
+    if not parallel or page_count < RESUME_PARALLEL_MIN_PAGES or RESUME_PDF_WORKERS < 2:
+        for n in range(page_count):
+            yield clean_text(reader.pages[n].extract_text() or "")
+        return
+
+    # Workers read the PDF from a temp file instead of every task receiving the
+    # bytes. At most RESUME_PDF_WORKERS ranges are in flight and the next one is
+    # only submitted as the oldest is consumed, so when the caller stops at the
+    # character budget only the ranges already running are wasted.
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+        f.write(data)
+    pool = get_pdf_pool()
+    ranges = (
+        range(start, min(start + RESUME_PDF_PAGES_PER_TASK, page_count))
+        for start in range(0, page_count, RESUME_PDF_PAGES_PER_TASK)
+    )
+    window = deque()
+    try:
+        for page_numbers in ranges:
+            window.append(pool.submit(_extract_pdf_pages, f.name, page_numbers))
+            if len(window) >= RESUME_PDF_WORKERS:
+                yield from window.popleft().result()
+        while window:
+            yield from window.popleft().result()
+    finally:
+        for future in window:
+            future.cancel()
+        # A range already handed to a worker may fail to open the removed file; its result is discarded.
+        os.remove(f.name)
+
+
+def _iter_docx_pages(uploaded_file):
+    yield clean_text(docx2txt.process(uploaded_file))
+
+
+def iter_resume_pages(uploaded_file, max_pages=RESUME_MAX_PAGES, max_chars=RESUME_MAX_CHARS, parallel=True):
+    """
+    Yield cleaned resume text page by page, stopping at the page or character budget.
+
+    Args:
+        uploaded_file: Streamlit UploadedFile (or any file object with a `type` MIME attribute)
+        max_pages: Maximum number of PDF pages to read
+        max_chars: Maximum total characters to yield; the last page is cut to fit
+        parallel: Extract long PDFs in the PDF process pool. Pass False from
+            code that already runs in a pool worker, so it doesn't start another pool
+
+    Yields:
+        str: Cleaned text of each page (DOCX files yield their whole text once)
+    """
+    file_type = uploaded_file.type
+    if "pdf" in file_type:
+        pages = _iter_pdf_pages(uploaded_file.getvalue(), max_pages, parallel)
+    elif "docx" in file_type or "doc" in file_type:
+        pages = _iter_docx_pages(uploaded_file)
+    else:
+        raise ValueError(f"Unsupported file type: {file_type}")
+
+    remaining = max_chars
+    try:
+        for page in pages:
+            if not page:
+                continue
+            yield page[:remaining]
+            remaining -= len(page)
+            if remaining <= 0:
+                return
+    finally:
+        pages.close()
@@ -0,0 +1,238 @@
+# utils/skill_gazetteer.py
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import deque
+
+from utils.asc_data import ASC_KB_JSON_PATH, load_asc_knowledge_base
+from utils.resume_sections import find_skills_sections, split_section_items
+
+# Below this share of skills-section items recognised (or this many skills when
+# there is no skills section) the LLM extractor is used as well.
+GAZETTEER_MIN_COVERAGE = float(os.environ.get("GAZETTEER_MIN_COVERAGE", 0.6))
+GAZETTEER_MIN_SKILLS = int(os.environ.get("GAZETTEER_MIN_SKILLS", 3))
+CONTEXT_CHARS = 60
+
+# Resume spellings mapped to a canonical skill name. When the canonical name is
+# itself an ASC technology tool the match lines up with the career matcher.
+ALIASES = {
+    "python": ["python3", "python 3", "py"],
+    "javascript": ["js", "ecmascript", "es6"],
+    "typescript": ["ts"],
+    "node.js": ["nodejs", "node js", "node"],
+    "react": ["react.js", "reactjs", "react js"],
+    "angular": ["angularjs", "angular.js"],
+    "vue.js": ["vue", "vuejs"],
+    "c#": ["c sharp", "csharp"],
+    "c++": ["cpp"],
+    "go": ["golang"],
+    ".net": ["dotnet", ".net core", ".net framework"],
+    "amazon web services": ["aws", "amazon aws"],
+    "microsoft azure": ["azure", "ms azure"],
+    "google cloud platform": ["gcp", "google cloud"],
+    "kubernetes": ["k8s"],
+    "postgresql": ["postgres", "psql"],
+    "mysql": ["my sql"],
+    "microsoft sql server": ["sql server", "mssql", "ms sql"],
+    "mongodb": ["mongo"],
+    "sql": ["structured query language"],
+    "microsoft excel": ["excel", "ms excel"],
+    "microsoft power bi": ["power bi", "powerbi"],
+    "microsoft word": ["ms word"],
+    "microsoft powerpoint": ["powerpoint", "ms powerpoint"],
+    "tableau": ["tableau desktop"],
+    "git": ["github", "gitlab"],
+    "docker": ["docker compose", "docker-compose"],
+    "terraform": ["hashicorp terraform"],
+    "jenkins": ["jenkins ci"],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "tensorflow": ["tf2"],
+    "pytorch": ["torch"],
+    "pandas": ["python pandas"],
+    "numpy": ["num py"],
+    "html": ["html5"],
+    "css": ["css3"],
+    "linux": ["gnu/linux", "ubuntu", "red hat linux", "centos"],
+    "salesforce": ["salesforce crm", "sfdc"],
+    "sap": ["sap erp"],
+    "jira": ["atlassian jira"],
+    "confluence": ["atlassian confluence"],
+}
+
+# Terms that are also everyday words or letters. Outside a skills section they
+# need confirmation before being reported.
+AMBIGUOUS_TERMS = {
+    "go", "r", "c", "swift", "rust", "spring", "excel", "access", "word", "outlook", "ruby", "shell", "chef",
+    "puppet", "express", "react", "node", "teams", "office", "project", "dart", "julia", "ts", "py", "js",
+    "torch", "ember", "meteor", "sas", "sap", "oracle", "visio", "slack", "zoom", "vue", "scala", "tf2",
+}
+
+
+def _is_word_char(char):
+    return char.isalnum() or char in "+#"
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: finds every occurrence of every term in one pass over the text."""
+
+    def __init__(self, terms):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for term in terms:
+            node = 0
+            for char in term:
+                if char not in self.goto[node]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[node][char] = len(self.goto) - 1
+                node = self.goto[node][char]
+            self.output[node].append(term)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def iter_matches(self, text):
+        """Yield (start, end, term) for every occurrence, including overlapping ones."""
+        node = 0
+        goto, fail, output = self.goto, self.fail, self.output
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for term in output[node]:
+                yield index + 1 - len(term), index + 1, term
+
+
+class SkillGazetteer:
+    """
+    Dictionary skill extractor over the ASC technology-tool vocabulary plus
+    ALIASES, matched case-insensitively on word boundaries with leftmost-longest
+    resolution of overlapping terms.
+    """
+
+    def __init__(self, tools, aliases=ALIASES, ambiguous_terms=AMBIGUOUS_TERMS):
+        self.canonical = {}
+        for tool in tools:
+            tool = re.sub(r"\s+", " ", tool.strip().lower())
+            if tool:
+                self.canonical[tool] = tool
+        for canonical, spellings in aliases.items():
+            self.canonical.setdefault(canonical, canonical)
+            for spelling in spellings:
+                self.canonical.setdefault(spelling, canonical)
+        self.ambiguous_terms = set(ambiguous_terms)
+        self.matcher = AhoCorasick(self.canonical)
+        # Identifies the vocabulary, so cached extractions are redone when it changes.
+        self.fingerprint = hashlib.sha256(
+            json.dumps([sorted(self.canonical.items()), sorted(self.ambiguous_terms)]).encode()
+        ).hexdigest()[:16]
+
+    def _find_terms(self, lowered):
+        """Return non-overlapping (start, end, term) matches on word boundaries, leftmost-longest."""
+        candidates = sorted(
+            (
+                (start, end, term)
+                for start, end, term in self.matcher.iter_matches(lowered)
+                if (start == 0 or not _is_word_char(lowered[start - 1]) or not _is_word_char(term[0]))
+                and (end == len(lowered) or not _is_word_char(lowered[end]) or not _is_word_char(term[-1]))
+            ),
+            key=lambda m: (m[0], -(m[1] - m[0])),
+        )
+        matches = []
+        position = 0
+        for start, end, term in candidates:
+            if start >= position:
+                matches.append((start, end, term))
+                position = end
+        return matches
+
+    def canonicalize(self, skill):
+        """Return the canonical name for a skill spelling, or the stripped spelling when it is unknown."""
+        skill = re.sub(r"\s+", " ", (skill or "").strip())
+        return self.canonical.get(skill.lower(), skill)
+
+    def merge(self, skills, extra):
+        """
+        Append skills from another extractor (e.g. the LLM) in canonical form,
+        skipping any already present regardless of spelling or case.
+        """
+        merged = list(skills)
+        seen = {skill.lower() for skill in merged}
+        for skill in extra:
+            skill = self.canonicalize(skill)
+            if skill and skill.lower() not in seen:
+                seen.add(skill.lower())
+                merged.append(skill)
+        return merged
+
+    def extract(self, text):
+        """
+        Find known skills in resume text.
+
+        Returns:
+            dict: {
+                "skills": confirmed canonical skills in order of first appearance,
+                "ambiguous": {canonical skill: surrounding text} for everyday-word
+                    hits outside a skills section,
+                "coverage": share of skills-section items recognised, or None
+                    when no skills section was found,
+                "needs_llm": True when coverage (or the skill count) is too low
+            }
+        """
+        lowered = text.lower()
+        sections = find_skills_sections(text)
+        skills = {}
+        ambiguous = {}
+        for start, end, term in self._find_terms(lowered):
+            canonical = self.canonical[term]
+            in_section = any(s <= start < e for s, e in sections)
+            if term in self.ambiguous_terms and not in_section:
+                if canonical not in skills:
+                    ambiguous.setdefault(
+                        canonical, text[max(0, start - CONTEXT_CHARS):end + CONTEXT_CHARS]
+                    )
+                continue
+            skills.setdefault(canonical, None)
+            ambiguous.pop(canonical, None)
+
+        coverage = None
+        items = [item for s, e in sections for item in split_section_items(text[s:e])]
+        if items:
+            recognised = sum(1 for item in items if self._find_terms(item.lower()))
+            coverage = recognised / len(items)
+            needs_llm = coverage < GAZETTEER_MIN_COVERAGE
+        else:
+            needs_llm = len(skills) < GAZETTEER_MIN_SKILLS
+
+        return {"skills": list(skills), "ambiguous": ambiguous, "coverage": coverage, "needs_llm": needs_llm}
+
+
+_gazetteers = {}
+_gazetteer_lock = threading.Lock()
+
+
+def get_skill_gazetteer(json_path=ASC_KB_JSON_PATH):
+    """Return the gazetteer for the ASC knowledge base, rebuilt when the file changes."""
+    entries = load_asc_knowledge_base(json_path)
+    with _gazetteer_lock:
+        cached = _gazetteers.get(json_path)
+        # load_asc_knowledge_base returns the same list object until the file changes.
+        if cached and (cached[0] is entries or not (cached[0] or entries)):
+            return cached[1]
+        tools = {tool for entry in entries for tool in entry.get("metadata", {}).get("technology_tools", [])}
+        gazetteer = SkillGazetteer(tools)
+        _gazetteers[json_path] = (entries, gazetteer)
+        return gazetteer
@@ -0,0 +1,194 @@
+# utils/supabase_client.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from supabase import create_client
+from supabase.lib.client_options import ClientOptions
+
+# Browser sessions whose clients are kept; the least recently used is dropped beyond this.
+SUPABASE_CLIENT_POOL_SIZE = int(os.environ.get("SUPABASE_CLIENT_POOL_SIZE", 500))
+# Tokens closer than this to expiry are refreshed in the background on the next rerun.
+SESSION_REFRESH_MARGIN_SECONDS = int(os.environ.get("SESSION_REFRESH_MARGIN_SECONDS", 120))
+
+
+class PooledSession:
+    """
+    One browser session's Supabase client together with its validated auth
+    session. The user is checked with Supabase once, when the session is
+    attached or signed in, and then served locally until the access token
+    nears expiry.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.user = None
+        self.access_token = None
+        self.refresh_token = None
+        self.expires_at = 0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def _store(self, response):
+        session = response.session
+        if not session:
+            self._clear()
+            return
+        self.user = response
+        self.access_token = session.access_token
+        self.refresh_token = session.refresh_token
+        self.expires_at = session.expires_at or (time.time() + (session.expires_in or 0))
+
+    def _clear(self):
+        self.user = None
+        self.access_token = None
+        self.refresh_token = None
+        self.expires_at = 0
+
+    def attach(self, access_token, refresh_token):
+        """
+        Restore tokens kept in st.session_state onto a client that has none,
+        e.g. after the pool dropped it or the worker restarted.
+
+        Raises:
+            Exception: The auth client's error when the tokens are rejected
+        """
+        with self._lock:
+            if self.access_token:
+                return
+            self._store(self.client.auth.set_session(access_token, refresh_token))
+
+    def sign_in(self, email, password):
+        """Sign in with email and password; the validated session is kept for later reruns."""
+        with self._lock:
+            response = self.client.auth.sign_in_with_password({"email": email, "password": password})
+            self._store(response)
+            return response
+
+    def sign_out(self):
+        with self._lock:
+            try:
+                self.client.auth.sign_out()
+            finally:
+                self._clear()
+
+    def tokens(self):
+        """Return the current tokens in the shape main.py keeps in st.session_state."""
+        with self._lock:
+            if not self.access_token:
+                return None
+            return {"access_token": self.access_token, "refresh_token": self.refresh_token}
+
+    def _refresh(self):
+        with self._lock:
+            try:
+                if self.refresh_token:
+                    self._store(self.client.auth.refresh_session(self.refresh_token))
+            finally:
+                self._refreshing = False
+
+    def _background_refresh(self):
+        try:
+            self._refresh()
+        except Exception as e:
+            # The token is still valid; get_user refreshes synchronously once it expires.
+            print(f"Background session refresh failed: {e}")
+
+    def get_user(self):
+        """
+        Return the signed-in user without a network call while the access token
+        is valid. A refresh is started in the background as expiry approaches
+        and done inline only once the token has expired.
+
+        Returns:
+            UserResponse: The validated user, or None when not signed in
+
+        Raises:
+            Exception: The auth client's error when an expired session cannot be refreshed
+        """
+        with self._lock:
+            if not self.access_token:
+                return None
+            remaining = self.expires_at - time.time()
+            user = self.user
+            if remaining > SESSION_REFRESH_MARGIN_SECONDS or (remaining > 0 and self._refreshing):
+                return user
+            if remaining > 0:
+                self._refreshing = True
+                _get_refresh_executor().submit(self._background_refresh)
+                return user
+            self._refreshing = True
+
+        try:
+            self._refresh()
+        except Exception:
+            with self._lock:
+                self._clear()
+            raise
+        return self.user
+
+
+class SupabaseClientPool:
+    """
+    Process-wide pool of Supabase clients keyed by browser session, so reruns
+    reuse the same client, its open connections and its validated auth
+    session instead of calling create_client and re-checking the user.
+    """
+
+    def __init__(self, url, key, max_clients=SUPABASE_CLIENT_POOL_SIZE):
+        self.url = url
+        self.key = key
+        self.max_clients = max_clients
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _new_client(self):
+        # Refresh is driven by PooledSession.get_user; gotrue's own refresh timer
+        # would otherwise start a thread per client.
+        return create_client(self.url, self.key, options=ClientOptions(auto_refresh_token=False, persist_session=False))
+
+    def session(self, session_id):
+        """Return the pooled session for a browser session, creating it on first use."""
+        with self._lock:
+            pooled = self._sessions.get(session_id)
+            if pooled is not None:
+                self._sessions.move_to_end(session_id)
+                return pooled
+        pooled = PooledSession(self._new_client())
+        with self._lock:
+            pooled = self._sessions.setdefault(session_id, pooled)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_clients:
+                self._sessions.popitem(last=False)
+        return pooled
+
+    def discard(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_refresh_executor = None
+_refresh_executor_lock = threading.Lock()
+
+
+def get_supabase_pool():
+    """Return the process-wide Supabase client pool for SUPABASE_URL and SUPABASE_KEY."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SupabaseClientPool(os.environ.get("SUPABASE_URL"), os.environ.get("SUPABASE_KEY"))
+    return _pool
+
+
+def _get_refresh_executor():
+    global _refresh_executor
+    if _refresh_executor is None:
+        with _refresh_executor_lock:
+            if _refresh_executor is None:
+                _refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="supabase-refresh")
+    return _refresh_executor
@@ -1,4 +1,227 @@
+import functools
+import os
+import threading
+import time
+
 import streamlit as st
+from utils.agents.tracing import timed_operation
+
+# Rows per request for batched writes; PostgREST handles a few hundred rows per call comfortably.
+BULK_WRITE_BATCH_SIZE = 500
+# Upper bound on how long skills/competencies cached in-process can miss writes made by other workers.
+USER_DATA_CACHE_TTL_SECONDS = float(os.environ.get("USER_DATA_CACHE_TTL_SECONDS", 60))
+# Postgres function returning a user's skills, competencies and a version stamp in one call.
+PROFILE_RPC = os.environ.get("PROFILE_RPC", "get_user_profile_data")
+PROFILE_TABLES = ("user_skills", "user_competencies")
+
+# Cleared once an upsert reports that the tables lack the keys from sql/user_profile_unique_keys.sql.
+_unique_keys_available = True
+
+_profile_versions = {}
+_profile_versions_lock = threading.Lock()
+_profile_listeners = []
+
+
+def _traced_query(func):
+    """
+    Record the latency of a Supabase data access function in the span log.
+    Functions served from UserDataCache are not wrapped; their queries are
+    timed where they execute, so the spans measure database latency only.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with timed_operation("supabase", func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def get_profile_version(user_id):
+    """
+    Return the in-process version of a user's skills and competencies.
+
+    The version is bumped by every write below, so readers can tell whether
+    profile data they cached earlier is still current.
+    """
+    with _profile_versions_lock:
+        return _profile_versions.get(user_id, 0)
+
+
+def register_profile_listener(callback):
+    """Call callback(user_id) whenever a user's profile data is written."""
+    with _profile_versions_lock:
+        _profile_listeners.append(callback)
+
+
+def invalidate_user_profile(user_id):
+    """Mark cached profile data for the user as outdated."""
+    with _profile_versions_lock:
+        _profile_versions[user_id] = _profile_versions.get(user_id, 0) + 1
+        listeners = list(_profile_listeners)
+    for callback in listeners:
+        try:
+            callback(user_id)
+        except Exception as e:
+            print(f"Error in profile listener: {e}")
+
+
+class UserDataCache:
+    """
+    Process-wide read-through cache of each user's user_skills and
+    user_competencies rows, shared by every reader below.
+
+    A miss loads both tables in one call to the PROFILE_RPC function (see
+    sql/get_user_profile_data.sql), falling back to a select per table when
+    the function isn't installed. Entries are tagged with the user's profile
+    version, so the writes in this module invalidate them immediately; the
+    TTL bounds staleness from writes made by other workers. Once it passes,
+    the server's version stamp is sent back and rows are only re-sent if the
+    profile changed.
+    """
+
+    def __init__(self, ttl_seconds=USER_DATA_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._rpc_available = True
+
+    def _count(self, table, outcome):
+        counters = self._stats.setdefault(table, {})
+        counters[outcome] = counters.get(outcome, 0) + 1
+
+    def rows(self, supabase, user_id, table, columns):
+        """
+        Return the user's rows from table, querying Supabase only on a miss.
+
+        Raises:
+            Exception: The client's error on a failed query (nothing is cached)
+        """
+        version = get_profile_version(user_id)
+        with self._lock:
+            entry = self._entries.get((user_id, table))
+            if entry and entry[0] == version and time.time() - entry[1] < self.ttl_seconds:
+                self._count(table, "hits")
+                return [dict(row) for row in entry[2]]
+            self._count(table, "misses")
+            rpc_available = self._rpc_available
+
+        if rpc_available:
+            try:
+                return [dict(row) for row in self._load_profile(supabase, user_id, version)[table]]
+            except Exception as e:
+                # PGRST202: the function doesn't exist in this database.
+                if getattr(e, "code", None) != "PGRST202":
+                    raise
+                print(f"{PROFILE_RPC} is not installed; reading profile tables separately")
+                with self._lock:
+                    self._rpc_available = False
+
+        with timed_operation("supabase", f"{table}.select"):
+            response = supabase.table(table).select(columns).eq("user_id", user_id).execute()
+        rows = response.data or []
+        self._store(user_id, version, {table: rows}, None)
+        return [dict(row) for row in rows]
+
+    def profile(self, supabase, user_id):
+        """
+        Return both tables and the server's version stamp for the user.
+
+        Returns:
+            dict: {"user_skills": rows, "user_competencies": rows, "version": stamp
+                or None when the profile function isn't installed}
+        """
+        skills = self.rows(supabase, user_id, "user_skills", "skill")
+        competencies = self.rows(supabase, user_id, "user_competencies", "*")
+        with self._lock:
+            entry = self._entries.get((user_id, "user_competencies"))
+        return {"user_skills": skills, "user_competencies": competencies, "version": entry[3] if entry else None}
+
+    def _load_profile(self, supabase, user_id, version):
+        with self._lock:
+            cached = [self._entries.get((user_id, table)) for table in PROFILE_TABLES]
+        stamps = {entry[3] if entry else None for entry in cached}
+        known = stamps.pop() if len(stamps) == 1 else None
+
+        with timed_operation("supabase", PROFILE_RPC, revalidation=bool(known)):
+            response = supabase.rpc(PROFILE_RPC, {"p_user_id": user_id, "p_known_version": known}).execute()
+        data = response.data or {}
+        if known and data.get("unchanged"):
+            with self._lock:
+                self._count("profile", "revalidated")
+            tables = {table: entry[2] for table, entry in zip(PROFILE_TABLES, cached)}
+        else:
+            tables = {table: data.get(table) or [] for table in PROFILE_TABLES}
+        self._store(user_id, version, tables, data.get("version"))
+        return tables
+
+    def _store(self, user_id, version, tables, stamp):
+        with self._lock:
+            # A write that landed while the query ran has bumped the version; don't cache pre-write rows.
+            if get_profile_version(user_id) != version:
+                return
+            now = time.time()
+            for table, rows in tables.items():
+                self._entries[(user_id, table)] = (version, now, rows, stamp)
+
+    def discard(self, user_id):
+        """Drop every cached table for the user."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+    def stats(self):
+        """Return hit and miss counts per table, and profile revalidations."""
+        with self._lock:
+            return {table: dict(counters) for table, counters in self._stats.items()}
+
+
+_user_data_cache = UserDataCache()
+register_profile_listener(_user_data_cache.discard)
+
+
+def get_user_data_cache():
+    """Return the process-wide user data cache."""
+    return _user_data_cache
+
+
+def _skill_rows(supabase, user_id):
+    return _user_data_cache.rows(supabase, user_id, "user_skills", "skill")
+
+
+def _competency_rows(supabase, user_id):
+    return _user_data_cache.rows(supabase, user_id, "user_competencies", "*")
+
+
+def get_user_profile_data(supabase, user_id):
+    """
+    Fetch a user's skills and competency ratings together, in at most one
+    round trip (none while the shared cache is current).
+
+    Args:
+        supabase: Supabase client object
+        user_id: The user's id
+
+    Returns:
+        dict: {"skills": [skill, ...], "competencies": {competency_name: rating},
+            "version": the server's stamp of this profile, or None when the
+            profile function isn't installed}
+
+    Raises:
+        Exception: The client's error; callers decide how to surface it
+    """
+    profile = _user_data_cache.profile(supabase, user_id)
+    return {
+        "skills": [row["skill"] for row in profile["user_skills"] if "skill" in row],
+        "competencies": {
+            row["competency_name"]: row["rating"]
+            for row in profile["user_competencies"]
+            if row.get("competency_name") is not None
+        },
+        "version": profile["version"],
+    }
+
+
+@_traced_query
 def get_user_profile(supabase, user):
     try:
         response = supabase.table('profiles').select('*').eq('id', user.iselectd).maybe_single().execute()
@@ -9,15 +232,16 @@ def get_user_profile(supabase, user):
 
 def get_user_skills(supabase, user):
     try:
-        response = supabase.table('user_skills').select('skill').eq('user_id', user.id).execute()
-        return [item['skill'] for item in response.data] if response.data else []
+        return [item['skill'] for item in _skill_rows(supabase, user.id)]
     except Exception as e:
         st.error(f"Error fetching skills: {e}")
         return []
 
+@_traced_query
 def add_user_skill(supabase, user, skill):
     try:
         response = supabase.table('user_skills').insert({"user_id": user.id, "skill": skill}, upsert=True).execute()
+        invalidate_user_profile(user.id)
         return len(response.data) > 0
     except Exception as e:
         st.error(f"Error adding skill: {e}")
@@ -25,59 +249,26 @@ def add_user_skill(supabase, user, skill):
 
 def get_user_competencies(supabase, user):
     try:
-        response = supabase.table('user_competencies').select('competency_name, rating').eq('user_id', user.id).execute()
-        return {item['competency_name']: item['rating'] for item in response.data} if response.data else {}
+        return {item['competency_name']: item['rating'] for item in _competency_rows(supabase, user.id)}
     except Exception as e:
         st.error(f"Error fetching competencies: {e}")
         return {}
 
 def save_user_competencies(supabase, user, ratings_dict):
     try:
+        existing_data = {item["competency_name"]: item["rating"] for item in _competency_rows(supabase, user.id)}
 
-        existing_response = (
-            supabase.table("user_competencies")
-            .select("competency_name, rating")
-            .eq("user_id", user.id)
-            .execute()
-        )
-
-        existing_data = {
-            item["competency_name"]: item["rating"]
-            for item in existing_response.data
-        } if existing_response.data else {}
-
-        all_same = all(existing_data.get(name) == rating for name, rating in ratings_dict.items())
-        if all_same and len(existing_data) == len(ratings_dict):
+        changed = {name: rating for name, rating in ratings_dict.items() if existing_data.get(name) != rating}
+        if not changed:
             return "already_exists", 0
 
-        saved_count = 0
-        for name, rating in ratings_dict.items():
-            if existing_data.get(name) != rating:
-
-                update_result = supabase.table("user_competencies") \
-                    .update({"rating": rating}) \
-                    .eq("user_id", user.id) \
-                    .eq("competency_name", name) \
-                    .execute()
-
-                if not update_result.data:
-                    insert_result = supabase.table("user_competencies") \
-                        .insert({
-                            "user_id": user.id,
-                            "competency_name": name,
-                            "rating": rating
-                        }) \
-                        .execute()
-
-                    if insert_result.data:
-                        saved_count += 1
-                else:
-                    saved_count += 1
-
-        if saved_count > 0:
-            return "updated", saved_count
-        else:
-            return "already_exists", 0
+        rows = [
+            {"user_id": user.id, "competency_name": name, "rating": rating}
+            for name, rating in changed.items()
+        ]
+        saved_count = bulk_upsert(supabase, "user_competencies", rows, on_conflict="user_id,competency_name")
+        invalidate_user_profile(user.id)
+        return "updated", saved_count
 
     except Exception as e:
         st.error(f"❌ Something went wrong while saving competencies: {e}")
@@ -99,29 +290,21 @@ def save_user_skills_to_supabase(supabase, user, skills):
     """
     saved_count = 0
     try:
-        existing = (
-            supabase.table("user_skills")
-            .select("skill")
-            .eq("user_id", user.id)
-            .in_("skill", skills)
-            .execute()
-        )
-
-        existing_skills = {item["skill"] for item in existing.data}
-
-        if len(existing_skills) == len(set(skills)):
-            return "already_exists", 0
+        existing_skills = {item["skill"] for item in _skill_rows(supabase, user.id)}
 
         data_to_upsert = [
             {"user_id": user.id, "skill": skill}
-            for skill in skills
+            for skill in dict.fromkeys(skills)
             if skill not in existing_skills
         ]
+        if not data_to_upsert:
+            return "already_exists", 0
 
-        if data_to_upsert:
-            supabase.table("user_skills").upsert(data_to_upsert).execute()
-            saved_count = len(data_to_upsert)
-
+        # ignore_duplicates keeps this safe when the cached rows predate another worker's write.
+        saved_count = bulk_upsert(
+            supabase, "user_skills", data_to_upsert, on_conflict="user_id,skill", ignore_duplicates=True
+        )
+        invalidate_user_profile(user.id)
         return "saved", saved_count
 
     except Exception as e:
@@ -130,10 +313,7 @@ def save_user_skills_to_supabase(supabase, user, skills):
 
 def fetch_saved_skills(supabase, user_id):
     try:
-        response = supabase.table("user_skills").select("skill").eq("user_id", user_id).execute()
-        if response.data:
-            return [entry["skill"] for entry in response.data if "skill" in entry]
-        return []
+        return [entry["skill"] for entry in _skill_rows(supabase, user_id) if "skill" in entry]
     except Exception as e:
         print("❌ Error fetching skills:", e)
         return []
@@ -141,10 +321,7 @@ def fetch_saved_skills(supabase, user_id):
 
 def fetch_saved_competencies(supabase, user_id):
     try:
-        response = supabase.table("user_competencies").select("*").eq("user_id", user_id).execute()
-        if response.data:
-            return response.data
-        return []
+        return _competency_rows(supabase, user_id)
     except Exception as e:
         print(f"Error fetching competencies: {e}")
         return []
@@ -157,14 +334,8 @@ def get_competency_ratings(supabase, user_id):
         dict: A dictionary {skill_name: rating}
     """
     try:
-        response = supabase.table("user_competencies").select("competency_name", "rating").eq("user_id", user_id).execute()
-
-        if response.error:
-            print(f"Error fetching ratings: {response.error}")
-            return {}
-
         ratings = {}
-        for record in response.data:
+        for record in _competency_rows(supabase, user_id):
             skill_name = record.get("competency_name")
             rating = record.get("rating")
             if skill_name is not None:
@@ -174,3 +345,100 @@ def get_competency_ratings(supabase, user_id):
     except Exception as e:
         print(f"Error retrieving competency ratings: {e}")
         return {}
+
+
+def bulk_upsert(supabase, table, rows, on_conflict, ignore_duplicates=False, batch_size=BULK_WRITE_BATCH_SIZE):
+    """
+    Upsert rows with one request per batch_size rows.
+
+    Args:
+        supabase: Supabase client object
+        table: Table name
+        rows: List of row dicts
+        on_conflict: Comma separated columns of the table's unique key, e.g. "user_id,skill".
+            Without that constraint the rows are written through _upsert_by_key instead
+        ignore_duplicates: Leave existing rows untouched instead of updating them
+
+    Returns:
+        int: Number of rows sent
+
+    Raises:
+        Exception: The client's error; callers decide how to surface it
+    """
+    global _unique_keys_available
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        if _unique_keys_available:
+            try:
+                with timed_operation("supabase", f"{table}.upsert", rows=len(batch)):
+                    supabase.table(table).upsert(
+                        batch, on_conflict=on_conflict, ignore_duplicates=ignore_duplicates
+                    ).execute()
+                continue
+            except Exception as e:
+                # 42P10: no unique constraint matches on_conflict in this database.
+                if getattr(e, "code", None) != "42P10":
+                    raise
+                print(f"{table} has no unique key on ({on_conflict}); run sql/user_profile_unique_keys.sql")
+                _unique_keys_available = False
+        with timed_operation("supabase", f"{table}.upsert_by_key", rows=len(batch)):
+            _upsert_by_key(supabase, table, batch, on_conflict.split(","), ignore_duplicates)
+    return len(rows)
+
+
+def _upsert_by_key(supabase, table, rows, key_columns, ignore_duplicates):
+    """
+    Upsert without a unique constraint: look up which keys already exist,
+    insert the rest in one request and update the existing rows one by one.
+    Only used until sql/user_profile_unique_keys.sql has been run.
+    """
+    user_column, name_column = key_columns
+    rows_by_user = {}
+    for row in rows:
+        rows_by_user.setdefault(row[user_column], []).append(row)
+
+    new_rows = []
+    for user_id, user_rows in rows_by_user.items():
+        response = (
+            supabase.table(table)
+            .select(name_column)
+            .eq(user_column, user_id)
+            .in_(name_column, [row[name_column] for row in user_rows])
+            .execute()
+        )
+        existing = {item[name_column] for item in response.data or []}
+        for row in user_rows:
+            if row[name_column] not in existing:
+                new_rows.append(row)
+                existing.add(row[name_column])
+            elif not ignore_duplicates:
+                values = {k: v for k, v in row.items() if k not in key_columns}
+                supabase.table(table).update(values) \
+                    .eq(user_column, user_id) \
+                    .eq(name_column, row[name_column]) \
+                    .execute()
+
+    if new_rows:
+        supabase.table(table).insert(new_rows).execute()
+
+
+def save_skills_for_users(supabase, skills_by_user):
+    """
+    Add skills for many users with batched upserts into user_skills.
+
+    Args:
+        supabase: Supabase client object
+        skills_by_user: {user_id: [skill, ...]}
+
+    Returns:
+        int: Number of (user, skill) rows sent
+    """
+    rows = [
+        {"user_id": user_id, "skill": skill}
+        for user_id, skills in skills_by_user.items()
+        for skill in dict.fromkeys(skills)
+    ]
+    written = bulk_upsert(supabase, "user_skills", rows, on_conflict="user_id,skill", ignore_duplicates=True)
+    for user_id in skills_by_user:
+        invalidate_user_profile(user_id)
+    return written
@@ -1,7 +1,7 @@
 import openai
 import math
 import streamlit as st
-from utils.supabase_data_utils import fetch_saved_skills, fetch_saved_competencies
+from utils.supabase_data_utils import get_user_profile_data
 
 def create_svg_skills_visualization(categorized_skills):
     """
@@ -60,8 +60,12 @@ def create_svg_skills_visualization(categorized_skills):
     return svg
 
 def categorize_skills(supabase, user_id):
-    resume_skills = fetch_saved_skills(supabase,user_id,)
-    core_competencies = fetch_saved_competencies(supabase,user_id)
+    try:
+        profile = get_user_profile_data(supabase, user_id)
+    except Exception as e:
+        print(f"Error fetching profile: {e}")
+        profile = {"skills": [], "competencies": {}}
+    resume_skills = profile["skills"]
 
     categorized = {
         "Technical Skills": [],
@@ -72,8 +76,8 @@ def categorize_skills(supabase, user_id):
     soft_keywords = ["teamwork", "communication", "problem solving", "initiative and innovation", "learning"]
     business_keywords = ["digital literacy", "planning and organisation", "numeracy", "reading", "writing"]
 
-    for comp in core_competencies:
-        skill = comp.get("competency_name", "").lower()
+    for comp in profile["competencies"]:
+        skill = comp.lower()
         if skill in soft_keywords:
             categorized["Soft Skills"].append(skill)
         if skill in business_keywords: